@@ -1,71 +1,209 @@
-import google.generativeai as genai
+import asyncio
 import json
-import os
-import joblib
-import re
-import string
+import numpy as np
 from newsapi import NewsApiClient
+from utils.model_registry import get_registry, CALIBRATOR_FILE
+from utils.text_normalizer import clean_text, clean_batch
+from utils.calibration import apply_calibrator
+from utils.analysis_cache import get_analysis_cache, make_cache_key
+from utils.rate_limiter import estimate_tokens
+from utils.stream_parser import IncrementalJSONParser
+from utils.prompt_compressor import compress_article
+from utils.key_pool import get_key_pool, parse_keys, is_quota_error, QuotaExhausted
 
-def clean_text(text):
-    if not isinstance(text, str): return ""
-    text = text.lower()
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
-    text = re.sub(r'<.*?>', '', text)
-    text = re.sub(f'[{re.escape(string.punctuation)}]', '', text)
-    text = re.sub(r'\n', ' ', text)
-    return re.sub(r'\s+', ' ', text).strip()
+# Switching to 'gemini-flash-latest' (High-limit production model found in your list)
+GEMINI_MODEL = 'gemini-flash-latest'
+# Bump whenever the prompt or expected JSON schema changes, so cached results are not reused
+PROMPT_VERSION = "v2"
+# Article tokens per prompt; longer articles are condensed to their most informative sentences
+ARTICLE_TOKEN_BUDGET = 1000
+# Local verdicts at or above this calibrated confidence skip Gemini in triage mode
+TRIAGE_CONFIDENCE_THRESHOLD = 0.97
+# Label for analysis fields the local-only triage result does not assess
+NOT_EVALUATED = "Not evaluated"
+# Batch verdict used when no local model is loaded
+UNAVAILABLE_VERDICT = "Unavailable"
+# Typical size of the JSON verdict, charged against the TPM budget up front
+OUTPUT_TOKEN_ESTIMATE = 600
+
+def _usage_tokens(response):
+    """
+    Actual tokens billed for a response, if the SDK reports them.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", None) or None
+
+def _replay(result):
+    """
+    Emits an already complete analysis as stream events.
+    """
+    for key, value in result.items():
+        yield {"field": key, "value": value}
+    yield {"result": result}
 
 class AdvancedTruthLens:
-    def __init__(self, gemini_key=None, news_api_key=None):
-        self.gemini_key = gemini_key
+    def __init__(self, gemini_key=None, news_api_key=None, article_token_budget=ARTICLE_TOKEN_BUDGET):
+        # gemini_key may be a single key, a comma-separated list or a list of keys
+        gemini_keys = parse_keys(gemini_key)
         self.news_api_key = news_api_key
+        self.article_token_budget = article_token_budget
         
-        # Load local ML model if exists
-        self.local_model = None
-        self.vectorizer = None
-        try:
-            if os.path.exists("models/truthlens_model.pkl"):
-                self.local_model = joblib.load("models/truthlens_model.pkl")
-                self.vectorizer = joblib.load("models/tfidf_vectorizer.pkl")
-                print("✅ Local ML Model Loaded")
-        except Exception as e:
-            print(f"⚠️ Could not load local model: {e}")
+        # Local ML model is loaded once per process and shared across sessions
+        self.registry = get_registry()
+        if len(gemini_keys) > 1 and not self.registry.supports_per_key_clients():
+            print(f"⚠️ Installed google-generativeai cannot bind a client per key; key rotation is disabled and only the first of {len(gemini_keys)} Gemini keys is used.")
+            gemini_keys = gemini_keys[:1]
+        # A blank or separator-only key string counts as no key
+        self.gemini_key = gemini_keys or None
+        self.local_model, self.vectorizer = self.registry.load_local_model()
+        # Direct idf*tf*coef scorer, skips building sparse matrices for each article
+        self.scorer = self.registry.load_scorer(self.local_model, self.vectorizer) if self.local_model else None
+        # Optional: fitted by train_model.py, maps decision scores to probabilities
+        self.calibrator = self.registry.load(CALIBRATOR_FILE)
         
         if self.gemini_key:
-            genai.configure(api_key=self.gemini_key)
-            # Switching to 'gemini-flash-latest' (High-limit production model found in your list)
-            self.model = genai.GenerativeModel('gemini-flash-latest')
+            # Every call is routed to the least-loaded healthy key in the pool
+            self.key_pool = get_key_pool(self.gemini_key)
+            self.limiter = self.key_pool.limiter
+        self.cache = get_analysis_cache()
             
         if self.news_api_key:
             self.newsapi = NewsApiClient(api_key=self.news_api_key)
 
-    def analyze_article_with_gemini(self, text):
+    def predict_local_batch(self, texts, chunk_size=5000):
         """
-        Uses Gemini to perform deep fake news analysis.
-        Returns a structured JSON response.
+        Runs the local TF-IDF + PassiveAggressive model over many texts at once.
+        Uses the LinearScorer when available, otherwise each chunk is vectorized
+        with a single sparse transform call.
+        Returns {"verdicts", "scores", "confidence"} as ndarrays, where a positive
+        score leans towards the model's second class (REAL) and confidence is the
+        calibrated probability of the predicted verdict.
+        Without a local model every text gets an "Unavailable" verdict and NaN scores,
+        so the arrays still line up with the input.
+        """
+        texts = list(texts)
+        if not self.local_model:
+            missing = np.full(len(texts), np.nan)
+            return {"verdicts": np.full(len(texts), UNAVAILABLE_VERDICT, dtype=object), "scores": missing, "confidence": missing.copy()}
+
+        classes = self.local_model.classes_
+        verdicts = np.empty(len(texts), dtype=classes.dtype)
+        scores = np.empty(len(texts), dtype=np.float64)
+
+        for start in range(0, len(texts), chunk_size):
+            chunk = clean_batch(texts[start:start + chunk_size])
+            if self.scorer is not None:
+                decision = self.scorer.decision_function(chunk)
+            else:
+                decision = self.local_model.decision_function(self.vectorizer.transform(chunk))
+            end = start + len(chunk)
+            if decision.ndim == 1:
+                # Binary model: the sign of the margin picks the class, no second predict pass
+                scores[start:end] = decision
+                verdicts[start:end] = classes[(decision > 0).astype(np.intp)]
+            else:
+                scores[start:end] = decision.max(axis=1)
+                verdicts[start:end] = classes[decision.argmax(axis=1)]
+
+        p_positive = apply_calibrator(self.calibrator, scores)
+        confidence = np.where(verdicts == classes[-1], p_positive, 1.0 - p_positive)
+        return {"verdicts": verdicts, "scores": scores, "confidence": confidence}
+
+    def analyze_batch(self, texts, chunk_size=5000, threshold=TRIAGE_CONFIDENCE_THRESHOLD):
+        """
+        Local-only triage for a whole feed dump. Returns one dict per text
+        with the verdict, raw decision score, calibrated confidence and
+        whether it is ambiguous enough to need Gemini.
+        """
+        result = self.predict_local_batch(texts, chunk_size=chunk_size)
+        return [
+            # NaN confidence (no local model) never clears the threshold
+            {"local_verdict": str(v), "decision_score": float(s), "confidence": float(c), "needs_gemini": not bool(c >= threshold)}
+            for v, s, c in zip(result["verdicts"], result["scores"], result["confidence"])
+        ]
+
+    def _local_only_result(self, verdict, confidence, p_real):
+        """
+        Analysis dict in the same shape as Gemini's, built from the local model alone.
+        """
+        # Without a fitted calibrator the confidence is a plain logistic of the margin
+        kind = "calibrated confidence" if self.calibrator else "model confidence (uncalibrated)"
+        return {
+            "credibility_score": int(round(p_real * 100)),
+            "classification": "Reliable" if verdict == "REAL" else "Unreliable",
+            "summary": f"Clear-cut case: the local TF-IDF model classified this article as {verdict} with {confidence * 100:.1f}% {kind}, so the Gemini deep analysis was skipped.",
+            "clickbait_analysis": {
+                "is_clickbait": False,
+                "dissonance_score": 0,
+                "reason": "Not evaluated in fast triage mode."
+            },
+            "bias_analysis": {
+                "political_spectrum": NOT_EVALUATED,
+                "emotional_tone": NOT_EVALUATED
+            },
+            "fallacies": [],
+            "key_entities": [],
+            "sensationalism_rating": 0,
+            # Articles the local model flags as fake still deserve a human fact-check
+            "fact_check_recommendation": "False" if verdict == "REAL" else "True",
+            "source": "local",
+            "local_confidence": float(confidence),
+        }
+
+    def _triage_locally(self, text, threshold):
+        """
+        Returns a local-only result if the model is confident enough, else None.
+        """
+        if not self.local_model:
+            return None
+        try:
+            result = self.predict_local_batch([text])
+            verdict = str(result["verdicts"][0])
+            confidence = float(result["confidence"][0])
+        except Exception:
+            return None
+        if confidence < threshold:
+            return None
+        p_real = confidence if verdict == "REAL" else 1.0 - confidence
+        return self._local_only_result(verdict, confidence, p_real)
+
+    def analyze_article_triaged(self, text, threshold=TRIAGE_CONFIDENCE_THRESHOLD):
+        """
+        Tiered analysis: returns the local verdict when its calibrated confidence
+        is at least `threshold`, and escalates only ambiguous articles to Gemini.
+        """
+        local_result = self._triage_locally(text, threshold)
+        if local_result is not None:
+            return local_result
+        return self.analyze_article_with_gemini(text)
+
+    def _local_prediction(self, text):
+        """
+        Returns (verdict, confidence) from the local model for the prompt context.
         """
-        
-        # 1. Local Model Prediction (Fast Check)
         local_score = "N/A"
         local_pred = "Uncertain"
         
         if self.local_model:
             try:
-                # Essential: Apply same cleaning as training!
-                cleaned_input = clean_text(text)
-                vec = self.vectorizer.transform([cleaned_input])
-                pred = self.local_model.predict(vec)[0]
+                # Same cleaning + vectorizing path as the batch API
+                result = self.predict_local_batch([text])
+                pred = result["verdicts"][0]
+                confidence = float(result["confidence"][0])
                 
                 local_pred = pred
-                local_score = 90 if pred == "REAL" else 10
+                # Calibrated probability that the article is REAL
+                local_score = int(round((confidence if pred == "REAL" else 1.0 - confidence) * 100))
             except:
                 pass
+        return local_pred, local_score
 
-        if not self.gemini_key:
-            return {"error": "Authentication Missing", "message": "Please provide a Gemini API Key."}
-
+    def _build_prompt(self, text, local_pred, local_score):
+        # Dedupe, drop boilerplate and keep the highest TF-IDF sentences within the token budget
+        article = compress_article(text, self.vectorizer, self.article_token_budget, clean_fn=clean_text)
+        
         # Chain-of-Thought Prompting for Higher Accuracy
-        prompt = f"""
+        return f"""
         Act as an expert Disinformation Analyst. Your task is to provide a final credibility verification for the text below.
         
         CONTEXT: 
@@ -79,7 +217,7 @@ class AdvancedTruthLens:
         - Step 3: Check for "Clickbait Dissonance". Does the headline match the body?
         - Step 4: Synthesize both inputs into a final score.
         
-        Article Text: "{text[:4000]}..."
+        Article Text: "{article}..."
         
         Return a valid JSON object with ONLY this structure:
         {{
@@ -103,11 +241,12 @@ class AdvancedTruthLens:
             "fact_check_recommendation": "<True/False>"
         }}
         """
-        
-        
+
+    def _parse_response(self, response, cache_key):
+        """
+        Turns a Gemini response into the analysis dict (or an error dict).
+        """
         try:
-            response = self.model.generate_content(prompt)
-            
             # Check if response was blocked by safety filters
             if not response.parts:
                 return {
@@ -117,7 +256,9 @@ class AdvancedTruthLens:
             
             # Cleanup json (sometimes model returns ```json ... ```)
             raw_text = response.text.replace("```json", "").replace("```", "").strip()
-            return json.loads(raw_text)
+            result = json.loads(raw_text)
+            self.cache.put(cache_key, result)
+            return result
         except AttributeError as e:
             # Happens when response.text fails due to safety block
             return {
@@ -129,9 +270,164 @@ class AdvancedTruthLens:
                 "error": "Invalid Response", 
                 "message": f"⚠️ Gemini returned invalid data. This sometimes happens with very short or unusual text. Error: {str(e)}"
             }
+
+    def _model_for(self, lease):
+        return self.registry.get_gemini_model(lease.key, GEMINI_MODEL)
+
+    def _generate(self, prompt, stream=False):
+        """
+        Calls Gemini on a pooled key, moving on to the next key when one hits its quota.
+        """
+        tokens = estimate_tokens(prompt) + OUTPUT_TOKEN_ESTIMATE
+        self.limiter.acquire(tokens)
+        attempts = len(self.key_pool.keys)
+        for attempt in range(attempts):
+            lease = self.key_pool.acquire(tokens)
+            try:
+                response = self._model_for(lease).generate_content(prompt, stream=stream)
+            except Exception as e:
+                if not is_quota_error(e):
+                    raise
+                self.key_pool.report_quota_error(lease)
+                if attempt == attempts - 1:
+                    raise
+                continue
+            self.key_pool.report_success(lease, _usage_tokens(response))
+            return response
+
+    async def _generate_async(self, prompt):
+        tokens = estimate_tokens(prompt) + OUTPUT_TOKEN_ESTIMATE
+        attempts = len(self.key_pool.keys)
+        async with self.limiter.slot(tokens):
+            for attempt in range(attempts):
+                lease = await self.key_pool.acquire_async(tokens)
+                try:
+                    response = await self._model_for(lease).generate_content_async(prompt)
+                except Exception as e:
+                    if not is_quota_error(e):
+                        raise
+                    self.key_pool.report_quota_error(lease)
+                    if attempt == attempts - 1:
+                        raise
+                    continue
+                self.key_pool.report_success(lease, _usage_tokens(response))
+                return response
+
+    def analyze_article_with_gemini(self, text):
+        """
+        Uses Gemini to perform deep fake news analysis.
+        Returns a structured JSON response.
+        """
+        
+        # 1. Local Model Prediction (Fast Check)
+        local_pred, local_score = self._local_prediction(text)
+
+        if not self.gemini_key:
+            return {"error": "Authentication Missing", "message": "Please provide a Gemini API Key."}
+
+        # Re-clicks, reposts and shared Trending items hit the cache instead of Gemini
+        cache_key = make_cache_key(clean_text(text), PROMPT_VERSION, GEMINI_MODEL, self.article_token_budget)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        prompt = self._build_prompt(text, local_pred, local_score)
+        
+        try:
+            response = self._generate(prompt)
+            return self._parse_response(response, cache_key)
+        except QuotaExhausted as e:
+            return {"error": "Quota Exhausted", "message": f"⏳ {e}. Please try again in a minute."}
+        except Exception as e:
+            return {"error": "Analysis Failed", "message": str(e)}
+
+    def analyze_article_stream(self, text, triage_threshold=None):
+        """
+        Streaming version of analyze_article_with_gemini.
+        Yields {"field": name, "value": value} for each top-level JSON field as soon
+        as it has fully arrived, then a final {"result": analysis} (or {"error": ..., "message": ...}).
+        With `triage_threshold`, clear-cut articles are answered by the local model instead.
+        """
+        if triage_threshold is not None:
+            local_result = self._triage_locally(text, triage_threshold)
+            if local_result is not None:
+                yield from _replay(local_result)
+                return
+
+        local_pred, local_score = self._local_prediction(text)
+
+        if not self.gemini_key:
+            yield {"error": "Authentication Missing", "message": "Please provide a Gemini API Key."}
+            return
+
+        cache_key = make_cache_key(clean_text(text), PROMPT_VERSION, GEMINI_MODEL, self.article_token_budget)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            yield from _replay(cached)
+            return
+
+        prompt = self._build_prompt(text, local_pred, local_score)
+        parser = IncrementalJSONParser()
+
+        try:
+            for chunk in self._generate(prompt, stream=True):
+                for key, value in parser.feed(chunk.text):
+                    yield {"field": key, "value": value}
+            result = parser.result()
+        except QuotaExhausted as e:
+            yield {"error": "Quota Exhausted", "message": f"⏳ {e}. Please try again in a minute."}
+            return
+        except (AttributeError, ValueError) as e:
+            if isinstance(e, json.JSONDecodeError):
+                yield {
+                    "error": "Invalid Response", 
+                    "message": f"⚠️ Gemini returned invalid data. This sometimes happens with very short or unusual text. Error: {str(e)}"
+                }
+            else:
+                # chunk.text raises when the stream is cut off by a safety block
+                yield {
+                    "error": "Safety Block", 
+                    "message": "🛡️ This content was blocked by Gemini's safety filters. The text may contain extreme misinformation, hate speech, or policy violations. Please try a different article."
+                }
+            return
+        except Exception as e:
+            yield {"error": "Analysis Failed", "message": str(e)}
+            return
+
+        self.cache.put(cache_key, result)
+        yield {"result": result}
+
+    async def analyze_article_async(self, text):
+        """
+        Async version of analyze_article_with_gemini. Waits on the shared
+        RPM/TPM buckets and a concurrency slot instead of blocking the script thread.
+        """
+        local_pred, local_score = self._local_prediction(text)
+
+        if not self.gemini_key:
+            return {"error": "Authentication Missing", "message": "Please provide a Gemini API Key."}
+
+        cache_key = make_cache_key(clean_text(text), PROMPT_VERSION, GEMINI_MODEL, self.article_token_budget)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        prompt = self._build_prompt(text, local_pred, local_score)
+
+        try:
+            response = await self._generate_async(prompt)
+            return self._parse_response(response, cache_key)
+        except QuotaExhausted as e:
+            return {"error": "Quota Exhausted", "message": f"⏳ {e}. Please try again in a minute."}
         except Exception as e:
             return {"error": "Analysis Failed", "message": str(e)}
 
+    async def analyze_articles_async(self, texts):
+        """
+        Analyzes many articles concurrently; results keep the input order.
+        """
+        return await asyncio.gather(*(self.analyze_article_async(t) for t in texts))
+
     def get_trending_news(self, topic="general"):
         """
         Fetches trending news using NewsAPI
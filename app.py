@@ -1,13 +1,13 @@
 import streamlit as st
 import base64
 import plotly.graph_objects as go
-import time
 from utils.scraper import NewsScraper
-from utils.report_generator import generate_pdf_report
+from utils.report_cache import get_report_cache, report_key
 from utils.styles import apply_custom_styles
 from utils.stats_manager import StatsManager
-from advanced_engine import AdvancedTruthLens
+from advanced_engine import AdvancedTruthLens, TRIAGE_CONFIDENCE_THRESHOLD, NOT_EVALUATED
 import os
+from functools import partial
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -23,6 +23,8 @@ st.set_page_config(
 
 apply_custom_styles()
 stats_manager = StatsManager()
+# PDFs render on a shared background pool and are cached across reruns and sessions
+report_cache = get_report_cache()
 
 # --- Helpers ---
 def go_to_analysis(url):
@@ -39,6 +41,45 @@ if 'analysis_count' not in st.session_state:
 
 FREE_ANALYSIS_LIMIT = 3
 
+# History tab pagination
+HISTORY_PAGE_SIZE = int(os.getenv("TRUTHLENS_HISTORY_PAGE_SIZE", "10"))
+HISTORY_PAGE_SIZES = sorted({10, 20, 50, 100, HISTORY_PAGE_SIZE})
+
+# Bias labels of results without a bias assessment (local-only triage); left out of bias charts
+UNRATED_BIAS = {NOT_EVALUATED, "Unknown"}
+
+if 'history_page' not in st.session_state:
+    st.session_state.history_page = 0
+if 'history_page_size' not in st.session_state:
+    st.session_state.history_page_size = HISTORY_PAGE_SIZE
+
+def change_history_page(delta):
+    st.session_state.history_page = max(0, st.session_state.history_page + delta)
+
+def reset_history_page():
+    st.session_state.history_page = 0
+
+def history_report_key(record):
+    # blob_id already hashes the article + analysis; older inline records never change
+    return report_key(record['id'], blob_id=record.get('blob_id') or "inline")
+
+def load_history_report(record):
+    details = stats_manager.get_details(record)
+    return details.get('article_full'), details.get('full_analysis')
+
+def prepare_history_report(record):
+    """
+    Queues a past analysis' PDF when the user asks for it; a later rerun picks up the bytes.
+    """
+    report_cache.submit(history_report_key(record), partial(load_history_report, record))
+
+def render_report_status(refresh_key):
+    """
+    Placeholder while a report renders in the background; the button reruns the page to check on it.
+    """
+    st.caption("⏳ Preparing report...")
+    st.button("🔄 Refresh", key=refresh_key, use_container_width=True)
+
 # --- Helpers for Visuals ---
 
 def draw_gauge_chart(score):
@@ -74,11 +115,15 @@ def draw_radar_chart(data):
     # Heuristics to map the JSON response to radar chart
     subj = data['bias_analysis'].get('subjectivity_score', 50)
     sens = data.get('sensationalism_rating', 50)
-    bias = 100 if data['bias_analysis'].get('political_spectrum') != 'Center' else 20
+    spectrum = data['bias_analysis'].get('political_spectrum')
+    bias = 100 if spectrum != 'Center' else 20
     logic = 100 - (len(data.get('fallacies', [])) * 20) # Penalize fallacies
     fact = data.get('credibility_score', 50)
     
     values = [subj, sens, bias, max(0, logic), fact]
+    if spectrum in UNRATED_BIAS:
+        # Local-only triage results carry no bias assessment: drop the axis instead of scoring it
+        del features[2], values[2]
     
     fig = go.Figure()
     fig.add_trace(go.Scatterpolar(
@@ -133,14 +178,82 @@ def draw_entity_chart(entities):
     )
     return fig
 
+# --- Analyzer Cards (rendered as soon as their fields have streamed in) ---
+
+def render_clickbait_card(analysis):
+    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+    st.markdown("### 🎣 Clickbait Detector")
+    cb_data = analysis.get('clickbait_analysis', {})
+    is_cb = cb_data.get('is_clickbait', False)
+    score = cb_data.get('dissonance_score', 0)
+    
+    color = "#ef4444" if is_cb else "#34d399"
+    status = "Likely Clickbait" if is_cb else "Trustworthy Headline"
+    
+    st.markdown(f"""
+        <div style="text-align:center;">
+            <h2 style="color:{color}; margin:0;">{score}%</h2>
+            <p style="opacity:0.8;">Dissonance Score</p>
+            <div style="background:{color}; padding:5px; border-radius:5px; margin-top:10px; font-weight:bold;">{status}</div>
+        </div>
+    """, unsafe_allow_html=True)
+    st.markdown(f"**Reason:** {cb_data.get('reason', 'N/A')}")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def render_summary_text(analysis):
+    st.info(analysis.get('summary', 'No summary available.'))
+
+def render_summary_metrics(analysis):
+    bias = analysis.get('bias_analysis', {})
+    sc1, sc2 = st.columns(2)
+    with sc1:
+        st.markdown(f"**Political Leaning:** {bias.get('political_spectrum', 'N/A')}")
+        st.markdown(f"**Tone:** {bias.get('emotional_tone', 'N/A')}")
+    with sc2:
+        st.markdown(f"**Sensationalism:** {analysis.get('sensationalism_rating', 0)}/100")
+        st.markdown(f"**Fact-Check Needed:** {analysis.get('fact_check_recommendation', 'False')}")
+
+def render_gauge_card(analysis):
+    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+    st.plotly_chart(draw_gauge_chart(analysis.get('credibility_score', 0)), use_container_width=True)
+    st.markdown(f"<div style='text-align:center; font-size:1.2rem; font-weight:bold; color:white;'>Verdict: {analysis.get('classification', 'Unknown')}</div>", unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def render_radar_card(analysis):
+    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+    st.markdown("### 🕸️ Bias Radar")
+    st.plotly_chart(draw_radar_chart({"bias_analysis": {}, **analysis}), use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def render_entities_card(analysis):
+    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+    st.markdown("### 👥 Entity Sentiment")
+    entities = analysis.get('key_entities', [])
+    if entities:
+        st.plotly_chart(draw_entity_chart(entities), use_container_width=True)
+    else:
+        st.markdown("No major entities detected.")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def render_fallacies_card(analysis):
+    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+    st.markdown("### ⚠️ Logical Fallacies Detected")
+    if analysis.get('fallacies'):
+        for f in analysis['fallacies']:
+             st.markdown(f'<div style="padding:10px; background:rgba(239, 68, 68, 0.2); border-left:4px solid #ef4444; margin-bottom:10px; border-radius:4px;">{f}</div>', unsafe_allow_html=True)
+    else:
+        st.markdown("✅ No major logical fallacies detected.")
+    st.markdown('</div>', unsafe_allow_html=True)
+
 # --- Load API Keys (Support for both .env and Streamlit Cloud Secrets) ---
-gemini_key = os.getenv("GEMINI_API_KEY")
+# GEMINI_API_KEYS="key1,key2,..." enables key pooling for high traffic
+gemini_key = os.getenv("GEMINI_API_KEYS") or os.getenv("GEMINI_API_KEY")
 news_key = os.getenv("NEWS_API_KEY")
 
 # Fallback to Streamlit Secrets (for Cloud Deployment)
 if not gemini_key:
     try:
-        gemini_key = st.secrets["GEMINI_API_KEY"]
+        gemini_key = st.secrets.get("GEMINI_API_KEYS") or st.secrets["GEMINI_API_KEY"]
     except:
         pass
 
@@ -340,6 +453,9 @@ elif st.session_state.active_tab == "Analyzer":
         """)
         st.stop()
     
+    fast_triage = st.toggle("⚡ Fast triage (skip Gemini for clear-cut articles)", value=False,
+                            help="Uses the local model's calibrated confidence and only escalates ambiguous articles to Gemini.")
+    
     input_method = st.tabs(["📝 Paste Text", "🔗 Analyze URL"])
     
     article_content = ""
@@ -389,116 +505,101 @@ elif st.session_state.active_tab == "Analyzer":
         
         # Increment counter
         st.session_state.analysis_count += 1
+        # A new analysis replaces the previous one's export
+        st.session_state.pop('live_report', None)
+        
+        # --- RESULTS DASHBOARD ---
+        # Cards are laid out up front and filled in the moment their fields stream in
+        st.markdown("---")
+        progress_text = st.empty()
+        triage_note = st.empty()
+        
+        # 1. Headline Stats (Clickbait & Executive Summary)
+        c_cb, c_sum = st.columns([1, 2])
+        ph_clickbait = c_cb.empty()
+        with c_sum:
+            st.markdown("### 📋 Executive Summary") 
+            ph_summary = st.empty()
+            ph_summary_metrics = st.empty()
+        
+        # 2. Deep Metrics (Gauge & Radar)
+        c1, c2 = st.columns([1, 1])
+        ph_gauge, ph_radar = c1.empty(), c2.empty()
+        
+        # 3. Entities & Fallacies
+        c3, c4 = st.columns([1, 1])
+        ph_entities, ph_fallacies = c3.empty(), c4.empty()
+        
+        # (placeholder, fields the card needs, renderer)
+        cards = [
+            (ph_gauge, ["credibility_score", "classification"], render_gauge_card),
+            (ph_summary, ["summary"], render_summary_text),
+            (ph_clickbait, ["clickbait_analysis"], render_clickbait_card),
+            (ph_fallacies, ["fallacies"], render_fallacies_card),
+            (ph_entities, ["key_entities"], render_entities_card),
+            (ph_summary_metrics, ["bias_analysis", "sensationalism_rating", "fact_check_recommendation"], render_summary_metrics),
+            (ph_radar, ["bias_analysis", "fallacies", "credibility_score"], render_radar_card),
+        ]
         
-        # Animated Loading
-        progress_text = "Analysis in progress. Please wait."
-        my_bar = st.progress(0, text=progress_text)
+        analysis = {}
+        rendered = set()
+        final = None
+        triage_threshold = TRIAGE_CONFIDENCE_THRESHOLD if fast_triage else None
         
         with st.spinner("🤖 TruthLens AI is active..."):
-            time.sleep(0.5)
-            my_bar.progress(20, text="Reading semantic structure...")
-            
-            # Call Gemini
-            analysis = engine.analyze_article_with_gemini(article_content)
-            my_bar.progress(60, text="Detecting logical fallacies & bias...")
-            time.sleep(0.5)
-            my_bar.progress(90, text="Generating visualizing...")
-            time.sleep(0.3)
-            my_bar.empty()
-
-            if "error" in analysis:
-                st.error(analysis['message'])
-            else:
-                # Log Stats with article text
-                stats_manager.log_analysis(analysis, article_content)
-                
-                # --- RESULTS DASHBOARD ---
-                st.markdown("---")
-                
-                # 1. Headline Stats (Clickbait & Executive Summary)
-                c_cb, c_sum = st.columns([1, 2])
+            for event in engine.analyze_article_stream(article_content, triage_threshold=triage_threshold):
+                if "error" in event:
+                    final = event
+                    break
+                if "result" in event:
+                    final = analysis = event["result"]
+                else:
+                    analysis[event["field"]] = event["value"]
+                    progress_text.caption(f"📡 Receiving analysis... ({len(analysis)} sections ready)")
                 
-                with c_cb:
-                    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-                    st.markdown("### 🎣 Clickbait Detector")
-                    cb_data = analysis.get('clickbait_analysis', {})
-                    is_cb = cb_data.get('is_clickbait', False)
-                    score = cb_data.get('dissonance_score', 0)
-                    
-                    color = "#ef4444" if is_cb else "#34d399"
-                    status = "Likely Clickbait" if is_cb else "Trustworthy Headline"
-                    
-                    st.markdown(f"""
-                        <div style="text-align:center;">
-                            <h2 style="color:{color}; margin:0;">{score}%</h2>
-                            <p style="opacity:0.8;">Dissonance Score</p>
-                            <div style="background:{color}; padding:5px; border-radius:5px; margin-top:10px; font-weight:bold;">{status}</div>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    st.markdown(f"**Reason:** {cb_data.get('reason', 'N/A')}")
-                    st.markdown('</div>', unsafe_allow_html=True)
-
-                with c_sum:
-                    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-                    st.markdown("### 📋 Executive Summary") 
-                    st.info(analysis.get('summary', 'No summary available.'))
-                    
-                    sc1, sc2 = st.columns(2)
-                    with sc1:
-                        st.markdown(f"**Political Leaning:** {analysis['bias_analysis']['political_spectrum']}")
-                        st.markdown(f"**Tone:** {analysis['bias_analysis']['emotional_tone']}")
-                    with sc2:
-                        st.markdown(f"**Sensationalism:** {analysis.get('sensationalism_rating', 0)}/100")
-                        st.markdown(f"**Fact-Check Needed:** {analysis.get('fact_check_recommendation', 'False')}")
-                    st.markdown('</div>', unsafe_allow_html=True)
-
-                # 2. Deep Metrics (Gauge & Radar)
-                c1, c2 = st.columns([1, 1])
-                with c1:
-                    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-                    st.plotly_chart(draw_gauge_chart(analysis['credibility_score']), use_container_width=True)
-                    st.markdown(f"<div style='text-align:center; font-size:1.2rem; font-weight:bold; color:white;'>Verdict: {analysis['classification']}</div>", unsafe_allow_html=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                with c2:
-                    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-                    st.markdown("### 🕸️ Bias Radar")
-                    st.plotly_chart(draw_radar_chart(analysis), use_container_width=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
-
-                # 3. Entities & Fallacies
-                c3, c4 = st.columns([1, 1])
-                
-                with c3:
-                    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-                    st.markdown("### 👥 Entity Sentiment")
-                    entities = analysis.get('key_entities', [])
-                    if entities:
-                        st.plotly_chart(draw_entity_chart(entities), use_container_width=True)
-                    else:
-                        st.markdown("No major entities detected.")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                    
-                with c4:
-                    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-                    st.markdown("### ⚠️ Logical Fallacies Detected")
-                    if analysis.get('fallacies'):
-                        for f in analysis['fallacies']:
-                             st.markdown(f'<div style="padding:10px; background:rgba(239, 68, 68, 0.2); border-left:4px solid #ef4444; margin-bottom:10px; border-radius:4px;">{f}</div>', unsafe_allow_html=True)
-                    else:
-                        st.markdown("✅ No major logical fallacies detected.")
-                    st.markdown('</div>', unsafe_allow_html=True)
-
-                # 4. Export Report
-                st.markdown("### 📄 Export Analysis")
-                pdf_bytes = generate_pdf_report(article_content, analysis)
-                st.download_button(
-                    label="Download Full Report (PDF)",
-                    data=pdf_bytes,
-                    file_name="truthlens_report.pdf",
-                    mime="application/pdf",
-                    key="download-pdf"
-                )
+                # The final result is complete, so any card still waiting falls back to defaults
+                for idx, (placeholder, needs, render) in enumerate(cards):
+                    if idx in rendered:
+                        continue
+                    if final is not None or all(k in analysis for k in needs):
+                        with placeholder.container():
+                            render(analysis)
+                        rendered.add(idx)
+        progress_text.empty()
+
+        if final is None or "error" in final:
+            st.error(final['message'] if final else "⚠️ Analysis stream ended unexpectedly. Please try again.")
+        else:
+            if analysis.get('source') == "local":
+                triage_note.caption(f"⚡ Resolved by the local model ({analysis['local_confidence']*100:.1f}% confidence) - Gemini was not needed.")
+            
+            # Start rendering the PDF now; it overlaps with logging and the rest of the page.
+            # The key is kept in the session so the download survives reruns
+            st.session_state.live_report = report_key("live", article_content, analysis)
+            report_cache.submit(st.session_state.live_report, lambda: (article_content, analysis))
+            
+            # Log Stats with article text
+            stats_manager.log_analysis(analysis, article_content)
+
+    # 4. Export Report (the latest analysis of this session)
+    live_report = st.session_state.get('live_report')
+    if live_report:
+        st.markdown("### 📄 Export Analysis")
+        pdf_bytes = report_cache.get(live_report)
+        if pdf_bytes:
+            st.download_button(
+                label="Download Full Report (PDF)",
+                data=pdf_bytes,
+                file_name="truthlens_report.pdf",
+                mime="application/pdf",
+                key="download-pdf"
+            )
+        elif report_cache.error(live_report):
+            st.error(f"⚠️ Could not generate the PDF report: {report_cache.error(live_report)}")
+        elif report_cache.is_pending(live_report):
+            render_report_status("refresh-pdf")
+        else:
+            st.caption("⚠️ This report is no longer cached. Run the analysis again to export it.")
                     
 # --- TRENDING NEWS PAGE ---
 elif st.session_state.active_tab == "Trending News":
@@ -545,20 +646,34 @@ elif st.session_state.active_tab == "Trending News":
 elif st.session_state.active_tab == "History":
     st.markdown("### 📊 Analysis History")
     
-    data = stats_manager.get_stats()
+    total = stats_manager.count()
     
-    if not data or not data.get('history'):
+    if not total:
         st.info("📌 No analysis history yet. Start analyzing articles to build your history!")
     else:
-        # Display total count
-        st.markdown(f"**Total Articles Analyzed:** {data['total']}")
+        page_size = st.session_state.history_page_size
+        page_count = -(-total // page_size)
+        page = min(st.session_state.history_page, page_count - 1)
+        st.session_state.history_page = page
+        
+        # Display total count + pagination controls
+        st.markdown(f"**Total Articles Analyzed:** {total}")
+        nav1, nav2, nav3, nav4 = st.columns([1, 2, 1, 1])
+        with nav1:
+            st.button("⬅️ Newer", key="history_prev", on_click=change_history_page, args=(-1,), disabled=page == 0, use_container_width=True)
+        with nav2:
+            st.markdown(f"<p style='text-align:center; margin-top:0.5rem;'>Page {page + 1} of {page_count}</p>", unsafe_allow_html=True)
+        with nav3:
+            st.button("Older ➡️", key="history_next", on_click=change_history_page, args=(1,), disabled=page >= page_count - 1, use_container_width=True)
+        with nav4:
+            st.selectbox("Per page", HISTORY_PAGE_SIZES, key="history_page_size", on_change=reset_history_page, label_visibility="collapsed")
         st.markdown("---")
         
-        # Reverse history to show most recent first
-        history = list(reversed(data['history']))
+        # Only the current page is read from the store, most recent first
+        history = stats_manager.list_history(offset=page * page_size, limit=page_size)
         
         # Display each article
-        for idx, record in enumerate(history):
+        for record in history:
             # Determine verdict color
             verdict = record.get('verdict', 'Unknown')
             if 'Reliable' in verdict:
@@ -614,23 +729,30 @@ elif st.session_state.active_tab == "History":
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    # Download PDF button
-                    if record.get('full_analysis') and record.get('article_full'):
-                        try:
-                            pdf_bytes = generate_pdf_report(
-                                record.get('article_full', ''),
-                                record.get('full_analysis', {})
-                            )
-                            st.download_button(
-                                label="📄 Download Report",
-                                data=pdf_bytes,
-                                file_name=f"truthlens_report_{idx+1}.pdf",
-                                mime="application/pdf",
-                                key=f"download_history_{idx}",
-                                use_container_width=True
-                            )
-                        except:
-                            st.caption("⚠️ Report unavailable")
+                    # Cached bytes if this report was prepared before, else render in the background on request
+                    report_id = history_report_key(record)
+                    pdf_bytes = report_cache.get(report_id)
+                    if pdf_bytes:
+                        st.download_button(
+                            label="📄 Download Report",
+                            data=pdf_bytes,
+                            file_name=f"truthlens_report_{record['id']}.pdf",
+                            mime="application/pdf",
+                            key=f"download_history_{record['id']}",
+                            use_container_width=True
+                        )
+                    elif report_cache.error(report_id):
+                        st.caption("⚠️ Report unavailable")
+                    elif report_cache.is_pending(report_id):
+                        render_report_status(f"refresh_history_{record['id']}")
+                    else:
+                        st.button(
+                            "📄 Prepare Report",
+                            key=f"prepare_history_{record['id']}",
+                            on_click=prepare_history_report,
+                            args=(record,),
+                            use_container_width=True
+                        )
                     
                     # Timestamp
                     st.caption(f"🕒 {record.get('timestamp', 'Unknown')[:19]}")
@@ -641,7 +763,8 @@ elif st.session_state.active_tab == "History":
 elif st.session_state.active_tab == "Stats":
     st.markdown("### 📈 Your Analysis History")
     
-    data = stats_manager.get_stats()
+    # Running aggregates only: same cost at record 10 as at record 10 million
+    data = stats_manager.get_stats(include_history=False)
     
     if not data:
         st.info("No analysis history found yet. Analyze some articles to see your stats!")
@@ -704,13 +827,14 @@ elif st.session_state.active_tab == "Stats":
             
             # Bar chart for Bias from history
             counts = {'Left': 0, 'Center-Left':0, 'Center':0, 'Center-Right':0, 'Right':0}
-            for rec in data['history']:
-                bias = rec.get('bias', 'Center')
+            for bias, n in data['bias'].items():
+                if bias in UNRATED_BIAS:
+                     continue
                 if bias in counts:
-                     counts[bias] += 1
+                     counts[bias] += n
                 else: 
                      # Handle slight gemini variations "Center-Left" vs "Left-Center"
-                     counts['Center'] += 1
+                     counts['Center'] += n
             
             fig = go.Figure([go.Bar(x=list(counts.keys()), y=list(counts.values()), marker_color='#60a5fa')])
             fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", font={'color': "white"}, height=300, margin=dict(l=20, r=20, t=0, b=0))
@@ -722,7 +846,7 @@ elif st.session_state.active_tab == "Stats":
         st.markdown("### 📋 Recent Analyses")
         
         # Get last 5 analyses
-        recent_analyses = list(reversed(data['history']))[:5]
+        recent_analyses = stats_manager.list_history(offset=0, limit=5)
         
         for idx, record in enumerate(recent_analyses):
             # Determine verdict styling
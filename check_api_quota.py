@@ -6,6 +6,7 @@ This script checks your current Gemini API usage and limits.
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
+from utils.rate_limiter import FREE_TIER_RPM, FREE_TIER_RPD, FREE_TIER_TPM
 
 # Load environment variables
 load_dotenv()
@@ -57,9 +58,9 @@ def check_api_quota():
         print("=" * 50)
         
         print("\n🆓 Free Tier Limits (Gemini API):")
-        print("  • Requests per minute (RPM): 15")
-        print("  • Requests per day (RPD): 1,500")
-        print("  • Tokens per minute (TPM): 1,000,000")
+        print(f"  • Requests per minute (RPM): {FREE_TIER_RPM}")
+        print(f"  • Requests per day (RPD): {FREE_TIER_RPD:,}")
+        print(f"  • Tokens per minute (TPM): {FREE_TIER_TPM:,}")
         
         print("\n💡 How to Check Your Actual Usage:")
         print("  1. Visit: https://aistudio.google.com/app/apikey")
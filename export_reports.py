@@ -0,0 +1,51 @@
+"""
+Bulk Report Export
+Renders the PDF report of every matching history record into a single ZIP.
+
+    python export_reports.py --out reports.zip --since 2026-01-01 --until 2026-01-31 --verdict Unreliable
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from utils.stats_manager import StatsManager
+from utils.report_export import export_reports
+
+def build_filters(args):
+    filters = {}
+    if args.since:
+        filters["since"] = date.fromisoformat(args.since).isoformat()
+    if args.until:
+        # Inclusive end date: everything before the following midnight
+        filters["until"] = (date.fromisoformat(args.until) + timedelta(days=1)).isoformat()
+    if args.verdict:
+        filters["verdict"] = args.verdict
+    return filters
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export TruthLens history reports as a ZIP of PDFs")
+    parser.add_argument("--out", default="truthlens_reports.zip", help="ZIP file to write")
+    parser.add_argument("--since", help="First day to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Last day to include (YYYY-MM-DD)")
+    parser.add_argument("--verdict", action="append", help="Only this verdict (e.g. Reliable, Unreliable); repeatable")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default: all CPU cores)")
+    args = parser.parse_args()
+
+    stats_manager = StatsManager()
+    filters = build_filters(args)
+    total = stats_manager.count(filters)
+    if not total:
+        print("📌 No history records match these filters.")
+        sys.exit(0)
+
+    print(f"📦 Exporting {total} reports to {args.out}...")
+    start = time.perf_counter()
+
+    def progress(exported, skipped):
+        done = exported + skipped
+        if done % 50 == 0 or done == total:
+            print(f"   {done}/{total} rendered")
+
+    result = export_reports(stats_manager, args.out, filters=filters, workers=args.workers, progress=progress)
+    print(f"✅ {result['exported']} reports exported ({result['skipped']} skipped) in {time.perf_counter() - start:.1f}s")
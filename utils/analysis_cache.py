@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = "data/cache/analysis"
+
+def make_cache_key(cleaned_text, prompt_version, model_name, token_budget=None):
+    """
+    Content address for an analysis: same cleaned text + same prompt/model/article budget = same result.
+    """
+    h = hashlib.sha256()
+    h.update(f"{prompt_version}\0{model_name}\0".encode("utf-8"))
+    if token_budget is not None:
+        # A different budget compresses the article differently, so Gemini sees another prompt
+        h.update(f"budget={token_budget}\0".encode("utf-8"))
+    h.update(cleaned_text.encode("utf-8"))
+    return h.hexdigest()
+
+class AnalysisCache:
+    """
+    Two-tier cache for Gemini analysis results.
+    Tier 1 is an in-memory LRU, tier 2 is one JSON file per key on disk,
+    bounded by TTL and total size (oldest files are evicted first).
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_memory_items=256, ttl_seconds=7 * 24 * 3600, max_disk_bytes=50 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self._disk_bytes = sum(e.stat().st_size for e in os.scandir(self.cache_dir) if e.name.endswith(".json"))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _expired(self, created):
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry["created"]):
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return entry["result"]
+                del self._memory[key]
+
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+
+            if entry is None or self._expired(entry.get("created", 0)):
+                if entry is not None:
+                    self._remove_file(path)
+                self.counters["misses"] += 1
+                return None
+
+            self._remember(key, entry)
+            self.counters["disk_hits"] += 1
+            return entry["result"]
+
+    def put(self, key, result):
+        entry = {"created": time.time(), "result": result}
+        payload = json.dumps(entry)
+        with self._lock:
+            self._remember(key, entry)
+            path = self._path(key)
+            try:
+                old_size = os.path.getsize(path) if os.path.exists(path) else 0
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+                self._disk_bytes += len(payload.encode("utf-8")) - old_size
+                self.counters["writes"] += 1
+            except OSError:
+                return # Disk tier is best-effort, memory tier still works
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _remove_file(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self._disk_bytes -= size
+            self.counters["evictions"] += 1
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        # Drop expired entries first, then the oldest until we are under budget
+        files = sorted(
+            (e for e in os.scandir(self.cache_dir) if e.name.endswith(".json")),
+            key=lambda e: e.stat().st_mtime
+        )
+        for e in files:
+            if self._disk_bytes <= self.max_disk_bytes and not self._expired(e.stat().st_mtime):
+                break
+            self._remove_file(e.path)
+
+    def stats(self):
+        lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        return {
+            **self.counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_items": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            for e in os.scandir(self.cache_dir):
+                if e.name.endswith(".json"):
+                    self._remove_file(e.path)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_analysis_cache():
+    """
+    Process-wide cache shared by every session.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnalysisCache()
+    return _cache
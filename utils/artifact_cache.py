@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import shutil
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+CACHE_DIR = "data/cache/training"
+
+def fingerprint(*parts):
+    """
+    Stable short hash of any JSON-serialisable inputs.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+def file_signature(path):
+    """
+    Identifies a source file by path, size and modification time, without reading multi-GB CSVs.
+    """
+    st = os.stat(path)
+    return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+
+class TrainingArtifactCache:
+    """
+    Keeps expensive training intermediates between runs:
+      - the cleaned corpus as Parquet, keyed by source files + cleaning config
+      - the fitted vectorizer and train/test TF-IDF matrices, keyed by corpus + vectorizer params
+    Sparse matrices are stored as raw .npy components (data/indices/indptr) so they
+    can be memory-mapped back instead of re-read into RAM.
+    """
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    # --- Cleaned corpus ---
+
+    def corpus_path(self, key):
+        return os.path.join(self.cache_dir, f"corpus_{key}.parquet")
+
+    def load_corpus(self, key):
+        path = self.corpus_path(key)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def save_corpus(self, key, df):
+        path = self.corpus_path(key)
+        df.to_parquet(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+
+    # --- Vectorizer + feature matrices ---
+
+    def features_dir(self, key):
+        return os.path.join(self.cache_dir, f"features_{key}")
+
+    def load_features(self, key, mmap_mode="c"):
+        """
+        Returns (vectorizer, {name: csr_matrix}) or None if not cached.
+        mmap_mode='c' is copy-on-write, so sklearn can use the arrays without touching the files.
+        """
+        folder = self.features_dir(key)
+        manifest_path = os.path.join(folder, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        matrices = {}
+        for name, shape in manifest["matrices"].items():
+            arrays = [np.load(os.path.join(folder, f"{name}.{part}.npy"), mmap_mode=mmap_mode)
+                      for part in ("data", "indices", "indptr")]
+            matrices[name] = sp.csr_matrix(tuple(arrays), shape=tuple(shape), copy=False)
+        vectorizer = joblib.load(os.path.join(folder, "vectorizer.pkl"))
+        return vectorizer, matrices
+
+    def save_features(self, key, vectorizer, matrices):
+        folder = self.features_dir(key)
+        tmp = f"{folder}.tmp"
+        if not os.path.exists(tmp):
+            os.makedirs(tmp)
+
+        manifest = {"matrices": {}}
+        for name, matrix in matrices.items():
+            matrix = sp.csr_matrix(matrix)
+            for part in ("data", "indices", "indptr"):
+                np.save(os.path.join(tmp, f"{name}.{part}.npy"), getattr(matrix, part))
+            manifest["matrices"][name] = list(matrix.shape)
+        joblib.dump(vectorizer, os.path.join(tmp, "vectorizer.pkl"))
+        # Manifest last: a half-written folder is never mistaken for a cache hit
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+
+        if os.path.exists(folder):
+            shutil.rmtree(folder)
+        os.replace(tmp, folder)
@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+import zlib
+
+BLOB_DIR = "data/blobs"
+
+def _canonical(payload):
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+def content_id(payload):
+    """
+    The blob id a payload is (or would be) stored under.
+    """
+    return hashlib.sha256(_canonical(payload)).hexdigest()
+
+class BlobStore:
+    """
+    Content-addressed store for heavy JSON payloads (article text + full analysis).
+    Each blob is zlib-compressed and named by the SHA-256 of its canonical JSON,
+    so identical payloads are stored once and a blob never changes after it is written.
+    """
+    def __init__(self, root=BLOB_DIR, level=6):
+        self.root = root
+        self.level = level
+
+    def _path(self, blob_id):
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.root, blob_id[:2], f"{blob_id[2:]}.json.z")
+
+    def put(self, payload):
+        """
+        Stores a JSON-serialisable payload and returns its blob id.
+        """
+        data = _canonical(payload)
+        blob_id = hashlib.sha256(data).hexdigest()
+        path = self._path(blob_id)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(data, self.level))
+            os.replace(tmp_path, path)
+        return blob_id
+
+    def get(self, blob_id):
+        """
+        Returns the payload, or None if the blob is missing or unreadable.
+        """
+        try:
+            with open(self._path(blob_id), "rb") as f:
+                return json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    def exists(self, blob_id):
+        return os.path.exists(self._path(blob_id))
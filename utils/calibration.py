@@ -0,0 +1,42 @@
+import numpy as np
+
+def fit_calibrator(scores, labels, positive_label="REAL", method="sigmoid"):
+    """
+    Maps raw PassiveAggressive decision_function margins to P(positive_label).
+    'sigmoid' is Platt scaling, 'isotonic' a monotone step fit.
+    The result is stored as plain floats/arrays so inference only needs NumPy.
+    """
+    scores = np.asarray(scores, dtype=np.float64).ravel()
+    y = (np.asarray(labels) == positive_label).astype(int)
+
+    if method == "isotonic":
+        from sklearn.isotonic import IsotonicRegression
+        iso = IsotonicRegression(out_of_bounds="clip", y_min=0.0, y_max=1.0).fit(scores, y)
+        return {
+            "method": "isotonic",
+            "positive_label": positive_label,
+            "x": np.asarray(iso.X_thresholds_, dtype=np.float64),
+            "y": np.asarray(iso.y_thresholds_, dtype=np.float64),
+        }
+
+    from sklearn.linear_model import LogisticRegression
+    lr = LogisticRegression(C=1e6, max_iter=1000).fit(scores.reshape(-1, 1), y)
+    return {
+        "method": "sigmoid",
+        "positive_label": positive_label,
+        "a": float(lr.coef_[0][0]),
+        "b": float(lr.intercept_[0]),
+    }
+
+def apply_calibrator(calibrator, scores):
+    """
+    Returns P(positive_label) for each decision score.
+    Without a fitted calibrator this falls back to a plain logistic of the margin,
+    which keeps the ordering but is not calibrated.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if not calibrator:
+        return 1.0 / (1.0 + np.exp(-scores))
+    if calibrator["method"] == "isotonic":
+        return np.interp(scores, calibrator["x"], calibrator["y"])
+    return 1.0 / (1.0 + np.exp(-(calibrator["a"] * scores + calibrator["b"])))
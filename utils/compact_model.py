@@ -0,0 +1,207 @@
+import json
+import os
+import re
+import zlib
+from collections import Counter
+import numpy as np
+import scipy.sparse as sp
+
+MAGIC = b"TLCOMPACT1\0\0\0\0\0\0"
+ALIGN = 64
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def export_compact_model(model, vectorizer, path, prune_ratio=None):
+    """
+    Writes the TF-IDF vocabulary + linear classifier as one memory-mappable file.
+    Terms whose |coef| is at most prune_ratio * max|coef| are dropped (prune_ratio=None, the
+    default, keeps every term and matches sklearn exactly; pruned terms also leave the L2 norm,
+    so pruned scores drift from the full model's). The vocabulary is a string table (one UTF-8 blob + offsets) sorted by the
+    crc32 of each term, with float32 idf and coef arrays alongside.
+    Returns a dict with export stats.
+    """
+    if not hasattr(vectorizer, "vocabulary_"):
+        raise ValueError("Compact export needs a fitted vocabulary (TF-IDF), not a hashing vectorizer")
+    if vectorizer.analyzer != "word" or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None or vectorizer.strip_accents:
+        raise ValueError("Compact export only supports the default word analyzer")
+    if model.coef_.shape[0] != 1:
+        raise ValueError("Compact export only supports binary linear models")
+
+    coef = np.asarray(model.coef_[0], dtype=np.float64)
+    idf = np.asarray(vectorizer.idf_, dtype=np.float64) if vectorizer.use_idf else np.ones_like(coef)
+    if prune_ratio is None:
+        keep = np.ones(len(coef), dtype=bool)
+    else:
+        keep = np.abs(coef) > prune_ratio * np.abs(coef).max()
+
+    terms_by_id = [None] * len(vectorizer.vocabulary_)
+    for term, idx in vectorizer.vocabulary_.items():
+        terms_by_id[idx] = term.encode("utf-8")
+    order = sorted(np.flatnonzero(keep), key=lambda i: (zlib.crc32(terms_by_id[i]), terms_by_id[i]))
+
+    blob = b"".join(terms_by_id[i] for i in order)
+    lengths = np.array([len(terms_by_id[i]) for i in order], dtype=np.uint32)
+    arrays = {
+        "hashes": np.array([zlib.crc32(terms_by_id[i]) for i in order], dtype=np.uint32),
+        "offsets": np.concatenate([[0], np.cumsum(lengths)]).astype(np.uint32),
+        "blob": np.frombuffer(blob, dtype=np.uint8),
+        "idf": idf[order].astype(np.float32),
+        "coef": coef[order].astype(np.float32),
+    }
+
+    stop_words = vectorizer.get_stop_words()
+    header = {
+        "classes": [str(c) for c in model.classes_],
+        "intercept": float(model.intercept_[0]),
+        "analyzer": {
+            "lowercase": bool(vectorizer.lowercase),
+            "token_pattern": vectorizer.token_pattern,
+            "ngram_range": list(vectorizer.ngram_range),
+            "stop_words": sorted(stop_words) if stop_words else [],
+            "norm": vectorizer.norm,
+            "sublinear_tf": bool(vectorizer.sublinear_tf),
+        },
+        "arrays": {},
+    }
+    offset = 0
+    for name, arr in arrays.items():
+        header["arrays"][name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset = _align(offset + arr.nbytes)
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for name, arr in arrays.items():
+            f.seek(data_start + header["arrays"][name]["offset"])
+            f.write(arr.tobytes())
+    os.replace(tmp_path, path)
+
+    return {
+        "terms_total": len(coef),
+        "terms_kept": len(order),
+        "file_bytes": os.path.getsize(path),
+    }
+
+class CompactVectorizer:
+    """
+    TF-IDF transform over the pruned vocabulary. Mirrors sklearn's word analyzer
+    (token pattern, stop words, n-grams). The L2 norm only covers the kept terms,
+    so pruned models are a close approximation; unpruned ones match sklearn.
+    """
+    def __init__(self, hashes, offsets, blob, idf, analyzer):
+        self.hashes = hashes
+        self.offsets = offsets
+        self.blob = blob
+        self.n_terms = len(hashes)
+        self.idf = idf
+        self.lowercase = analyzer["lowercase"]
+        self.token_re = re.compile(analyzer["token_pattern"])
+        self.min_n, self.max_n = analyzer["ngram_range"]
+        self.stop_words = frozenset(analyzer["stop_words"])
+        self.norm = analyzer["norm"]
+        self.sublinear_tf = analyzer["sublinear_tf"]
+
+    def analyze(self, doc):
+        if self.lowercase:
+            doc = doc.lower()
+        tokens = [t for t in self.token_re.findall(doc) if t not in self.stop_words]
+        if self.max_n == 1:
+            return tokens
+        grams = list(tokens) if self.min_n == 1 else []
+        n_tokens = len(tokens)
+        for n in range(max(self.min_n, 2), self.max_n + 1):
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(n_tokens - n + 1))
+        return grams
+
+    def lookup(self, terms):
+        """
+        Maps terms to feature ids: crc32 + vectorized search over the sorted hash array,
+        then a byte comparison against the string table to rule out collisions.
+        Returns (ids, found mask) aligned with `terms`.
+        """
+        n = len(terms)
+        ids = np.zeros(n, dtype=np.intp)
+        found = np.zeros(n, dtype=bool)
+        if not n or not self.n_terms:
+            return ids, found
+
+        encoded = [t.encode("utf-8") for t in terms]
+        probe = np.fromiter((zlib.crc32(e) for e in encoded), dtype=np.uint32, count=n)
+        pos = np.searchsorted(self.hashes, probe)
+        hit = pos < self.n_terms
+        hit[hit] = self.hashes[pos[hit]] == probe[hit]
+
+        offsets, blob, hashes = self.offsets, self.blob, self.hashes
+        for k in np.flatnonzero(hit):
+            p = pos[k]
+            # Scan the (almost always single) run of equal hashes
+            while p < self.n_terms and hashes[p] == probe[k]:
+                if blob[offsets[p]:offsets[p + 1]].tobytes() == encoded[k]:
+                    ids[k] = p
+                    found[k] = True
+                    break
+                p += 1
+        return ids, found
+
+    def transform(self, docs):
+        indptr, indices, data = [0], [], []
+        for doc in docs:
+            counts = Counter(self.analyze(doc))
+            ids, found = self.lookup(list(counts))
+            ids = ids[found]
+            tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))[found]
+            if self.sublinear_tf:
+                tf = 1.0 + np.log(tf)
+            values = tf * self.idf[ids]
+            if self.norm == "l2" and values.size:
+                values = values / np.sqrt(np.dot(values, values))
+            elif self.norm == "l1" and values.size:
+                values = values / np.abs(values).sum()
+            order = np.argsort(ids)
+            indices.extend(ids[order])
+            data.extend(values[order])
+            indptr.append(len(indices))
+        return sp.csr_matrix((np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), indptr),
+                             shape=(len(indptr) - 1, self.n_terms))
+
+class CompactClassifier:
+    """
+    Linear decision function over the CompactVectorizer's feature space.
+    """
+    def __init__(self, coef, intercept, classes):
+        self.coef = coef
+        self.intercept_ = np.array([intercept])
+        self.classes_ = np.array(classes)
+
+    def decision_function(self, X):
+        return np.asarray(X @ self.coef, dtype=np.float64) + self.intercept_[0]
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(np.intp)]
+
+def load_compact_model(path):
+    """
+    Memory-maps a file written by export_compact_model.
+    Returns (classifier, vectorizer) with the same interface the engine uses for the sklearn pair.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a TruthLens compact model")
+        header_len = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    data_start = _align(len(MAGIC) + 8 + header_len)
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        arrays[name] = np.memmap(path, dtype=np.dtype(spec["dtype"]), mode="r",
+                                 offset=data_start + spec["offset"], shape=tuple(spec["shape"]))
+
+    vectorizer = CompactVectorizer(arrays["hashes"], arrays["offsets"], arrays["blob"], arrays["idf"], header["analyzer"])
+    classifier = CompactClassifier(arrays["coef"], header["intercept"], header["classes"])
+    return classifier, vectorizer
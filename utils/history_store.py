@@ -0,0 +1,466 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from utils.blob_store import BlobStore
+
+# "always": fsync every record, "interval": at most once per FSYNC_INTERVAL seconds, "never": leave it to the OS
+FSYNC_POLICIES = ("always", "interval", "never")
+FSYNC_INTERVAL = 1.0
+# Kept out of the index and stored compressed in the blob store, loaded on demand
+HEAVY_FIELDS = ("article_full", "full_analysis")
+# SQLite user_version once inline article content has been moved into the blob store
+SCHEMA_VERSION_BLOBS = 1
+
+def _matches(record, filters):
+    """
+    Python-side equivalent of SqliteHistoryStore's WHERE clause.
+    `verdict` / `bias` accept a single value or a list; since/until compare ISO timestamps.
+    """
+    for key in ("verdict", "bias"):
+        wanted = filters.get(key)
+        if wanted is None:
+            continue
+        wanted = [wanted] if isinstance(wanted, str) else wanted
+        if record.get(key) not in wanted:
+            return False
+    if filters.get("is_clickbait") is not None and bool(record.get("is_clickbait")) != bool(filters["is_clickbait"]):
+        return False
+    timestamp = record.get("timestamp", "")
+    if filters.get("since") and timestamp < filters["since"]:
+        return False
+    if filters.get("until") and timestamp >= filters["until"]:
+        return False
+    return True
+
+def empty_aggregates():
+    return {"total": 0, "score_sum": 0, "clickbait": 0, "verdicts": {}, "bias": {}}
+
+def record_score(record):
+    """
+    The record's score as a number, or 0 when it is missing or not numeric
+    (scores come from the LLM and may arrive as strings or junk).
+    """
+    try:
+        score = float(record.get("score") or 0)
+    except (TypeError, ValueError):
+        return 0
+    if not math.isfinite(score):
+        return 0
+    return int(score) if score.is_integer() else score
+
+def add_to_aggregates(aggregates, record):
+    aggregates["total"] += 1
+    aggregates["score_sum"] += record_score(record)
+    aggregates["clickbait"] += 1 if record.get("is_clickbait") else 0
+    verdict = record.get("verdict", "Unknown")
+    aggregates["verdicts"][verdict] = aggregates["verdicts"].get(verdict, 0) + 1
+    bias = record.get("bias", "Neutral")
+    aggregates["bias"][bias] = aggregates["bias"].get(bias, 0) + 1
+    return aggregates
+
+def split_record(record, blob_store):
+    """
+    Returns the slim index record: heavy fields are moved into the blob store
+    and replaced by a `blob_id`.
+    """
+    if not any(k in record for k in HEAVY_FIELDS):
+        return record
+    slim = {k: v for k, v in record.items() if k not in HEAVY_FIELDS}
+    slim["blob_id"] = blob_store.put({k: record.get(k) for k in HEAVY_FIELDS})
+    return slim
+
+def load_details(record, blob_store):
+    """
+    Full article text and analysis for an index record. Records written before
+    the split still carry them inline.
+    """
+    if any(k in record for k in HEAVY_FIELDS):
+        return {k: record.get(k) for k in HEAVY_FIELDS}
+    payload = blob_store.get(record["blob_id"]) if record.get("blob_id") else None
+    return payload or {"article_full": "", "full_analysis": {}}
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_history_store(backend, path, **kwargs):
+    """
+    One store per (backend, path) per process, shared by every session and rerun.
+    """
+    key = (backend, os.path.abspath(path))
+    with _stores_lock:
+        if key not in _stores:
+            if backend == "sqlite":
+                _stores[key] = SqliteHistoryStore(path, **kwargs)
+            elif backend == "jsonl":
+                _stores[key] = JsonlHistoryStore(path, **kwargs)
+            else:
+                raise ValueError(f"Unknown history backend: {backend}")
+        return _stores[key]
+
+class JsonlHistoryStore:
+    """
+    Append-only JSON Lines log: one record per line, written with a single append.
+    Queries scan the file, so it suits small histories; use SqliteHistoryStore for large ones.
+    Unfiltered aggregates come from a small sidecar (<path>.stats.json) instead.
+    New lines are slim index records; lines written before the blob store keep
+    their content inline and are still read as-is.
+    Record ids are 1-based line positions among valid records.
+    """
+    def __init__(self, path, fsync="interval", fsync_interval=FSYNC_INTERVAL, blob_store=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self.path = path
+        self.blob_store = blob_store or BlobStore()
+        self.sidecar_path = f"{path}.stats.json"
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._last_fsync = 0.0
+        self._lock = threading.Lock()
+        self._aggregates = None
+        # Byte offset of the log the aggregates cover
+        self._covered = 0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def append_many(self, records):
+        """
+        Appends records as lines: constant cost however long the history is.
+        Raises only if nothing was appended, so the caller can safely retry.
+        """
+        data = "".join(json.dumps(split_record(r, self.blob_store)) + "\n" for r in records).encode("utf-8")
+        # Unbuffered, so a failed write leaves nothing behind to be flushed on close
+        with open(self.path, "a+b", buffering=0) as f:
+            start = f.tell()
+            # A crash mid-write can leave a torn last line; start on a fresh one
+            if start > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[f.write(view):]
+            except OSError:
+                # e.g. disk full part-way: drop the partial lines so a retry cannot duplicate them
+                os.ftruncate(f.fileno(), start)
+                raise
+            now = time.monotonic()
+            if self.fsync == "always" or (self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval):
+                try:
+                    os.fsync(f.fileno())
+                    self._last_fsync = now
+                except OSError as e:
+                    print(f"⚠️ Could not fsync {self.path}: {e}")
+
+        # The records are in the log now; the sidecar is only a cache and is
+        # rebuilt from the covered offset, so failing to update it is not fatal
+        try:
+            with self._lock:
+                # Only the lines just written are read back
+                self._sync_aggregates()
+                self._save_sidecar()
+        except Exception as e:
+            print(f"⚠️ Could not update history totals in {self.sidecar_path}: {e}")
+
+    def _load_sidecar(self):
+        try:
+            with open(self.sidecar_path, "r") as f:
+                sidecar = json.load(f)
+            return sidecar["aggregates"], sidecar["covered"]
+        except Exception:
+            return empty_aggregates(), 0
+
+    def _save_sidecar(self):
+        tmp_path = f"{self.sidecar_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"aggregates": self._aggregates, "covered": self._covered}, f)
+        os.replace(tmp_path, self.sidecar_path)
+
+    def _sync_aggregates(self):
+        """
+        Brings the running aggregates up to date with the log. Only lines past the
+        covered offset are read, so this is O(new records); a missing or stale
+        sidecar (e.g. the log was replaced) triggers a one-off full rebuild.
+        """
+        if self._aggregates is None:
+            self._aggregates, self._covered = self._load_sidecar()
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size < self._covered:
+            self._aggregates, self._covered = empty_aggregates(), 0
+        if size == self._covered:
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self._covered)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Incomplete last line: picked up once its write finishes
+                    break
+                self._covered += len(line)
+                try:
+                    add_to_aggregates(self._aggregates, json.loads(line))
+                except ValueError:
+                    continue
+
+    def iter_records(self):
+        """
+        Yields every record oldest first, with its id. Torn or corrupt lines are skipped.
+        """
+        if not os.path.exists(self.path):
+            return
+        record_id = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                record_id += 1
+                record["id"] = record_id
+                yield record
+
+    def list_history(self, offset=0, limit=20, filters=None):
+        matching = [r for r in self.iter_records() if _matches(r, filters or {})]
+        matching.reverse()
+        return matching[offset:offset + limit] if limit is not None else matching[offset:]
+
+    def count(self, filters=None):
+        if not filters:
+            return self.aggregates()["total"]
+        return sum(1 for r in self.iter_records() if _matches(r, filters))
+
+    def get_record(self, record_id):
+        for record in self.iter_records():
+            if record["id"] == record_id:
+                return record
+        return None
+
+    def aggregates(self, filters=None):
+        if not filters:
+            with self._lock:
+                self._sync_aggregates()
+                return json.loads(json.dumps(self._aggregates))
+        aggregates = empty_aggregates()
+        for record in self.iter_records():
+            if _matches(record, filters):
+                add_to_aggregates(aggregates, record)
+        return aggregates
+
+class SqliteHistoryStore:
+    """
+    History in a SQLite database, indexed on timestamp, verdict and bias.
+    WAL mode lets every session read while one writes; each thread gets its own connection.
+    Running totals live in a `counters` table updated in the same transaction as each
+    insert, so unfiltered aggregates never scan the history.
+    Rows are slim index records; article text and analysis live in the blob store.
+    """
+    COLUMNS = ("timestamp", "verdict", "score", "is_clickbait", "bias", "summary",
+               "article_snippet", "blob_id")
+
+    def __init__(self, path, busy_timeout=5.0, blob_store=None):
+        self.path = path
+        self.blob_store = blob_store or BlobStore()
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._ensure_schema()
+
+    def exists(self):
+        return self._connect().execute("SELECT 1 FROM analyses LIMIT 1").fetchone() is not None
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only risks the last transactions on power loss, never corruption
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self):
+        conn = self._connect()
+        # One write transaction for the check and the seed, so two processes opening an
+        # older database at the same time cannot both seed the counters
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            has_counters = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='counters'").fetchone()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    verdict TEXT,
+                    score INTEGER,
+                    is_clickbait INTEGER,
+                    bias TEXT,
+                    summary TEXT,
+                    article_snippet TEXT,
+                    blob_id TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_timestamp ON analyses(timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_verdict ON analyses(verdict)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_bias ON analyses(bias)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            if not has_counters:
+                # Databases from before the counters table: seed it once from the rows
+                self._bump_counters(conn, self._scan_aggregates(conn, "", []))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self._move_inline_content(conn)
+
+    def _move_inline_content(self, conn, batch_size=500):
+        """
+        Databases from before the blob store keep article_full / full_analysis columns:
+        move their content into blobs once and clear the columns. Completion is recorded
+        in PRAGMA user_version, so later starts skip the scan.
+        """
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION_BLOBS:
+            return
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(analyses)")}
+        if "blob_id" not in columns:
+            with conn:
+                conn.execute("ALTER TABLE analyses ADD COLUMN blob_id TEXT")
+        if not set(HEAVY_FIELDS) <= columns:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION_BLOBS}")
+            return
+
+        moved = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, article_full, full_analysis FROM analyses "
+                "WHERE article_full IS NOT NULL OR full_analysis IS NOT NULL LIMIT ?", (batch_size,)
+            ).fetchall()
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                payload = {"article_full": row["article_full"] or "", "full_analysis": json.loads(row["full_analysis"] or "{}")}
+                updates.append((self.blob_store.put(payload), row["id"]))
+            with conn:
+                conn.executemany("UPDATE analyses SET blob_id = ?, article_full = NULL, full_analysis = NULL WHERE id = ?", updates)
+            moved += len(rows)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION_BLOBS}")
+        if moved:
+            print(f"✅ Moved {moved} history articles into the blob store")
+
+    def _bump_counters(self, conn, aggregates):
+        deltas = [("total", aggregates["total"]), ("score_sum", aggregates["score_sum"]), ("clickbait", aggregates["clickbait"])]
+        deltas += [(f"verdict:{v}", n) for v, n in aggregates["verdicts"].items()]
+        deltas += [(f"bias:{b}", n) for b, n in aggregates["bias"].items()]
+        conn.executemany(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            deltas
+        )
+
+    def _row_values(self, record):
+        return (
+            record.get("timestamp", ""),
+            record.get("verdict", "Unknown"),
+            record_score(record),
+            1 if record.get("is_clickbait") else 0,
+            record.get("bias", "Neutral"),
+            record.get("summary", ""),
+            record.get("article_snippet", ""),
+            record.get("blob_id"),
+        )
+
+    def _to_record(self, row):
+        record = dict(row)
+        record["is_clickbait"] = bool(record["is_clickbait"])
+        return record
+
+    def append_many(self, records):
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        aggregates = empty_aggregates()
+        for record in records:
+            add_to_aggregates(aggregates, record)
+        with conn:
+            conn.executemany(
+                f"INSERT INTO analyses ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                [self._row_values(split_record(r, self.blob_store)) for r in records]
+            )
+            self._bump_counters(conn, aggregates)
+
+    def _where(self, filters):
+        clauses, params = [], []
+        filters = filters or {}
+        for key in ("verdict", "bias"):
+            wanted = filters.get(key)
+            if wanted is None:
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            clauses.append(f"{key} IN ({', '.join('?' for _ in wanted)})")
+            params.extend(wanted)
+        if filters.get("is_clickbait") is not None:
+            clauses.append("is_clickbait = ?")
+            params.append(1 if filters["is_clickbait"] else 0)
+        if filters.get("since"):
+            clauses.append("timestamp >= ?")
+            params.append(filters["since"])
+        if filters.get("until"):
+            clauses.append("timestamp < ?")
+            params.append(filters["until"])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def list_history(self, offset=0, limit=20, filters=None):
+        """
+        One page of records, newest first. Served from the timestamp index,
+        so the cost depends on the page, not on the size of the history.
+        """
+        where, params = self._where(filters)
+        rows = self._connect().execute(
+            f"SELECT id, {', '.join(self.COLUMNS)} FROM analyses{where} "
+            f"ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+            params + [-1 if limit is None else limit, offset]
+        ).fetchall()
+        return [self._to_record(r) for r in rows]
+
+    def count(self, filters=None):
+        if not filters:
+            return self.aggregates()["total"]
+        where, params = self._where(filters)
+        return self._connect().execute(f"SELECT COUNT(*) FROM analyses{where}", params).fetchone()[0]
+
+    def get_record(self, record_id):
+        row = self._connect().execute(
+            f"SELECT id, {', '.join(self.COLUMNS)} FROM analyses WHERE id = ?", (record_id,)
+        ).fetchone()
+        return self._to_record(row) if row else None
+
+    def aggregates(self, filters=None):
+        """
+        Unfiltered totals are read from the counters table (a handful of rows);
+        filtered ones are computed in SQL, so only the counts leave the database.
+        """
+        conn = self._connect()
+        if not filters:
+            aggregates = empty_aggregates()
+            for name, value in conn.execute("SELECT name, value FROM counters WHERE value != 0"):
+                kind, sep, key = name.partition(":")
+                if sep:
+                    aggregates["verdicts" if kind == "verdict" else "bias"][key] = value
+                else:
+                    aggregates[name] = value
+            return aggregates
+        where, params = self._where(filters)
+        return self._scan_aggregates(conn, where, params)
+
+    def _scan_aggregates(self, conn, where, params):
+        total, score_sum, clickbait = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(score), 0), COALESCE(SUM(is_clickbait), 0) FROM analyses{where}", params
+        ).fetchone()
+        verdicts = dict(conn.execute(f"SELECT verdict, COUNT(*) FROM analyses{where} GROUP BY verdict", params).fetchall())
+        bias = dict(conn.execute(f"SELECT bias, COUNT(*) FROM analyses{where} GROUP BY bias", params).fetchall())
+        return {"total": total, "score_sum": score_sum, "clickbait": clickbait, "verdicts": verdicts, "bias": bias}
@@ -0,0 +1,222 @@
+import atexit
+import errno
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# OS errors that can clear by themselves; anything else (permissions, missing
+# directory, read-only filesystem...) fails the same way on every retry
+TRANSIENT_ERRNOS = {errno.EAGAIN, errno.EBUSY, errno.EINTR, errno.ETIMEDOUT, errno.ENOSPC}
+
+def is_transient_error(exc):
+    """
+    True for errors worth retrying as-is: a busy/locked SQLite database or a passing OS condition.
+    """
+    if isinstance(exc, sqlite3.OperationalError):
+        message = str(exc).lower()
+        return "locked" in message or "busy" in message
+    return isinstance(exc, OSError) and exc.errno in TRANSIENT_ERRNOS
+
+class FileLock:
+    """
+    Exclusive inter-process lock on a sidecar lock file (fcntl.flock on POSIX,
+    msvcrt.locking on Windows). Also serialises threads of the same process,
+    since OS file locks do not.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            self._file = open(self.path, "a+b")
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK gives up after ~10s of retries; keep waiting
+                        continue
+        except Exception:
+            if self._file:
+                self._file.close()
+                self._file = None
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+            self._thread_lock.release()
+
+class HistoryWriter:
+    """
+    Single background writer for a history store. Sessions hand records over with
+    submit() and return immediately; the writer thread drains the queue and commits
+    whatever has accumulated (up to batch_size) in one append_many call, holding
+    the store's file lock so several app processes can share the same files.
+    Transient failures are retried with backoff for up to max_retry_seconds;
+    records that can never be written are isolated and set aside instead of
+    blocking the queue.
+    """
+    def __init__(self, store, batch_size=100, linger=0.05, max_retry_seconds=300.0):
+        self.store = store
+        self.lock = get_store_lock(store)
+        self.batch_size = batch_size
+        # How long to wait for more records before committing a partial batch
+        self.linger = linger
+        # How long a batch may keep failing with transient errors before it is set aside
+        self.max_retry_seconds = max_retry_seconds
+        self.rejected_path = f"{store.path}.rejected.jsonl"
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush, 5.0)
+
+    def submit(self, record):
+        self._ensure_started()
+        self._queue.put(record)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._commit(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _commit(self, batch):
+        """
+        Writes a batch, retrying transient errors (locked database, passing I/O
+        conditions) with backoff until max_retry_seconds have gone by. Any other
+        error means a record is bad: the batch is split so the good records still
+        commit, and the record that fails on its own is dead-lettered at once.
+        """
+        delay = 0.5
+        give_up = time.monotonic() + self.max_retry_seconds
+        while True:
+            try:
+                with self.lock:
+                    self.store.append_many(batch)
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                self.failures += 1
+                if not is_transient_error(e):
+                    if len(batch) > 1:
+                        middle = len(batch) // 2
+                        self._commit(batch[:middle])
+                        self._commit(batch[middle:])
+                    else:
+                        self._reject(batch, e)
+                    return
+                if time.monotonic() + delay > give_up:
+                    self._reject(batch, e)
+                    return
+                print(f"⚠️ History write of {len(batch)} records failed, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def _reject(self, records, error):
+        """
+        Sets aside records the store refused, in <store>.rejected.jsonl.
+        """
+        self.rejected += len(records)
+        print(f"❌ Dropping {len(records)} history records: {error}")
+        try:
+            with open(self.rejected_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps({"error": str(error), "record": r}, default=str) + "\n" for r in records))
+        except OSError as e:
+            print(f"⚠️ Could not save the rejected records to {self.rejected_path}: {e}")
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every submitted record is committed. Returns False on timeout.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stats(self):
+        return {
+            "pending": self._queue.unfinished_tasks,
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+_locks = {}
+_writers = {}
+_registry_lock = threading.RLock()
+
+def get_store_lock(store):
+    """
+    The inter-process lock guarding a store's files (<path>.lock), one per store per process.
+    """
+    key = os.path.abspath(store.path)
+    with _registry_lock:
+        if key not in _locks:
+            _locks[key] = FileLock(f"{store.path}.lock")
+        return _locks[key]
+
+def get_history_writer(store):
+    key = os.path.abspath(store.path)
+    with _registry_lock:
+        if key not in _writers:
+            _writers[key] = HistoryWriter(store)
+        return _writers[key]
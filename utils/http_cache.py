@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+HTTP_CACHE_DIR = "data/cache/http"
+# Query parameters that only track the click and never change the page
+TRACKING_PARAMS = re.compile(r'^(utm_[a-z]+|fbclid|gclid|dclid|mc_cid|mc_eid|ocid|cmpid)$', re.I)
+# Pages with a Last-Modified date but no explicit lifetime stay fresh for 10% of their age, at most this long
+HEURISTIC_MAX_LIFETIME = 24 * 3600
+# Response headers kept with each entry: a 304 may omit them and only update some
+STORED_HEADERS = ("Cache-Control", "Expires", "Date", "Last-Modified", "ETag")
+
+def normalize_url(url):
+    """
+    Canonical form used as the cache key: lowercase scheme/host, no default port,
+    no fragment, no tracking parameters, remaining query parameters sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "http").lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAMS.match(k)
+    ))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+def parse_cache_control(value):
+    """
+    'max-age=60, no-cache' -> {"max-age": "60", "no-cache": True}
+    """
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else True
+    return directives
+
+def _http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+def freshness_lifetime(headers, now=None):
+    """
+    Seconds a response may be served without revalidation, following RFC 9111 for a
+    shared cache: s-maxage, then max-age, then Expires - Date, then the Last-Modified heuristic.
+    """
+    now = now or time.time()
+    cc = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in cc:
+        return 0
+    for directive in ("s-maxage", "max-age"):
+        if directive in cc:
+            try:
+                return max(0, int(cc[directive]))
+            except (TypeError, ValueError):
+                return 0
+    date = _http_date(headers.get("Date")) or now
+    if headers.get("Expires"):
+        expires = _http_date(headers.get("Expires"))
+        return max(0, int(expires - date)) if expires else 0
+    last_modified = _http_date(headers.get("Last-Modified"))
+    if last_modified and last_modified < date:
+        return min(int((date - last_modified) * 0.1), HEURISTIC_MAX_LIFETIME)
+    return 0
+
+class HttpCache:
+    """
+    On-disk HTTP cache for the scraper, keyed by normalised URL.
+    Each entry keeps the extracted article, the ETag / Last-Modified validators and the
+    freshness headers (not the raw page: a 304 reuses the extraction, so the HTML is
+    never needed again).
+    Fresh entries are served without a request; stale ones are revalidated with a
+    conditional GET (a 304 costs no body download).
+    Total size is bounded: the least recently used entries are evicted first.
+    """
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, max_bytes=100 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # scrape_many looks entries up from several threads at once
+        self._counters_lock = threading.Lock()
+        self.counters = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self._disk_bytes = sum(e.stat().st_size for e in os.scandir(self.cache_dir) if e.name.endswith(".json"))
+
+    def _path(self, url):
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _count(self, name):
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    def lookup(self, url):
+        """
+        Returns the cached entry for `url` (fresh or stale), or None.
+        """
+        path = self._path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            # mtime doubles as the last-used time for LRU eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+        return entry
+
+    def is_fresh(self, entry, now=None):
+        fresh = (now or time.time()) - entry["stored_at"] < entry["lifetime"]
+        if fresh:
+            self._count("fresh_hits")
+        return fresh
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, headers, result):
+        """
+        Caches the article extracted from a 200 response unless Cache-Control forbids it
+        (no-store, or private, since this cache is shared by every user). Failed extractions
+        are not cached, so a page that was still loading is retried next time.
+        Returns True if stored.
+        """
+        if not result.get("success"):
+            return False
+        cc = parse_cache_control(headers.get("Cache-Control"))
+        if "no-store" in cc or "private" in cc:
+            return False
+        if "Vary" in headers and headers["Vary"].strip() == "*":
+            return False
+
+        entry = {
+            "url": normalize_url(url),
+            "stored_at": time.time(),
+            "lifetime": freshness_lifetime(headers),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "headers": {name: headers[name] for name in STORED_HEADERS if headers.get(name)},
+            "result": result,
+        }
+        self._write(url, entry)
+        self._count("stores")
+        return True
+
+    def revalidated(self, url, entry, headers):
+        """
+        Refreshes a stale entry after a 304 Not Modified and returns it. Headers the 304
+        carries replace the stored ones (RFC 9111 4.3.4); the rest, e.g. a max-age the
+        server did not repeat, still apply.
+        """
+        stored = entry.get("headers") or {"ETag": entry.get("etag"), "Last-Modified": entry.get("last_modified")}
+        merged = {name: headers.get(name) or stored.get(name) for name in STORED_HEADERS}
+        entry["headers"] = {name: value for name, value in merged.items() if value}
+        entry["stored_at"] = time.time()
+        entry["lifetime"] = freshness_lifetime(entry["headers"])
+        entry["etag"] = entry["headers"].get("ETag")
+        entry["last_modified"] = entry["headers"].get("Last-Modified")
+        self._count("revalidated")
+        self._write(url, entry)
+        return entry
+
+    def _write(self, url, entry):
+        path = self._path(url)
+        data = json.dumps(entry).encode("utf-8")
+        with self._lock:
+            try:
+                old_size = os.path.getsize(path) if os.path.exists(path) else 0
+                # Written aside and renamed: lookup() never sees a half-written entry
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._disk_bytes += len(data) - old_size
+            except OSError:
+                return  # Best-effort: the scrape result is returned either way
+            if self._disk_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(
+            (e for e in os.scandir(self.cache_dir) if e.name.endswith(".json")),
+            key=lambda e: e.stat().st_mtime
+        )
+        for e in entries:
+            if self._disk_bytes <= self.max_bytes:
+                break
+            try:
+                size = e.stat().st_size
+                os.remove(e.path)
+                self._disk_bytes -= size
+            except OSError:
+                continue
+            self._count("evictions")
+
+    def stats(self):
+        with self._counters_lock:
+            return {**self.counters, "disk_bytes": self._disk_bytes}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_http_cache():
+    """
+    Process-wide cache shared by every session.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HttpCache()
+    return _cache
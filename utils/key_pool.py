@@ -0,0 +1,206 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from utils.rate_limiter import FREE_TIER_RPM, FREE_TIER_RPD, FREE_TIER_TPM, GeminiRateLimiter
+
+MINUTE = 60
+DAY = 24 * 3600
+
+class QuotaExhausted(Exception):
+    """
+    Raised when no key in the pool can take a request within the allowed wait.
+    """
+
+def parse_keys(keys):
+    """
+    Accepts a single key, a comma-separated string or a list and returns a de-duplicated list.
+    """
+    if not keys:
+        return []
+    if isinstance(keys, str):
+        keys = keys.split(",")
+    seen = []
+    for k in keys:
+        k = k.strip()
+        if k and k not in seen:
+            seen.append(k)
+    return seen
+
+def is_quota_error(exc):
+    """
+    True for 429 / RESOURCE_EXHAUSTED style errors from the Gemini SDK.
+    """
+    name = type(exc).__name__
+    text = str(exc).lower()
+    return name in ("ResourceExhausted", "TooManyRequests") or "429" in text or "quota" in text or "rate limit" in text
+
+class _KeyState:
+    def __init__(self, key):
+        self.key = key
+        self.minute = deque() # [timestamp, tokens]
+        self.day = deque()    # [timestamp, tokens]
+        self.cooldown_until = 0.0
+        self.quota_errors = 0
+        self.total_requests = 0
+
+    def prune(self, now):
+        while self.minute and now - self.minute[0][0] >= MINUTE:
+            self.minute.popleft()
+        while self.day and now - self.day[0][0] >= DAY:
+            self.day.popleft()
+
+class KeyLease:
+    """
+    One reserved request on one key. Pass it back to the pool with the outcome.
+    """
+    def __init__(self, key, entry):
+        self.key = key
+        self._entry = entry
+
+class GeminiKeyPool:
+    """
+    Routes each Gemini call to the least-loaded healthy key.
+    Every key has its own RPM/TPM budget over a sliding minute and an RPD budget
+    over a sliding day; keys that hit quota errors are cooled down with backoff.
+    """
+    def __init__(self, keys, rpm=FREE_TIER_RPM, tpm=FREE_TIER_TPM, rpd=FREE_TIER_RPD,
+                 cooldown_seconds=60, max_cooldown_seconds=3600, max_concurrency_per_key=8):
+        keys = parse_keys(keys)
+        if not keys:
+            raise ValueError("GeminiKeyPool needs at least one API key")
+        self.rpm = rpm
+        self.tpm = tpm
+        self.rpd = rpd
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self._states = [_KeyState(k) for k in keys]
+        self._lock = threading.Lock()
+        # Smooths bursts across the whole pool; capacity scales with the number of keys
+        self.limiter = GeminiRateLimiter(rpm=rpm * len(keys), tpm=tpm * len(keys),
+                                         max_concurrency=max_concurrency_per_key * len(keys))
+
+    @property
+    def keys(self):
+        return [s.key for s in self._states]
+
+    def _load(self, state):
+        minute_tokens = sum(e[1] for e in state.minute)
+        return max(len(state.minute) / self.rpm, minute_tokens / self.tpm, len(state.day) / self.rpd)
+
+    def _fits(self, state, tokens):
+        minute_tokens = sum(e[1] for e in state.minute)
+        return (len(state.minute) < self.rpm
+                and (minute_tokens + tokens <= self.tpm or not state.minute)
+                and len(state.day) < self.rpd)
+
+    def _wait_hint(self, state, now, tokens):
+        """
+        Seconds until this key could take another request of `tokens`.
+        """
+        waits = [max(0.0, state.cooldown_until - now)]
+        if state.minute and (len(state.minute) >= self.rpm or sum(e[1] for e in state.minute) + tokens > self.tpm):
+            waits.append(MINUTE - (now - state.minute[0][0]))
+        if len(state.day) >= self.rpd:
+            waits.append(DAY - (now - state.day[0][0]))
+        return max(waits)
+
+    def _try_acquire(self, tokens):
+        """
+        Returns (lease, None) on success or (None, seconds_to_wait).
+        """
+        with self._lock:
+            now = time.time()
+            candidates = []
+            for state in self._states:
+                state.prune(now)
+                if state.cooldown_until <= now and self._fits(state, tokens):
+                    candidates.append(state)
+
+            if not candidates:
+                return None, min(self._wait_hint(s, now, tokens) for s in self._states)
+
+            state = min(candidates, key=self._load)
+            entry = [now, tokens]
+            state.minute.append(entry)
+            state.day.append(entry)
+            state.total_requests += 1
+            return KeyLease(state.key, entry), None
+
+    def acquire(self, tokens=1, max_wait=30):
+        deadline = time.time() + max_wait
+        while True:
+            lease, wait = self._try_acquire(tokens)
+            if lease:
+                return lease
+            if time.time() + wait > deadline:
+                raise QuotaExhausted(f"All {len(self._states)} Gemini keys are at their quota (next slot in {wait:.0f}s)")
+            time.sleep(min(wait, 1.0) or 0.05)
+
+    async def acquire_async(self, tokens=1, max_wait=30):
+        deadline = time.time() + max_wait
+        while True:
+            lease, wait = self._try_acquire(tokens)
+            if lease:
+                return lease
+            if time.time() + wait > deadline:
+                raise QuotaExhausted(f"All {len(self._states)} Gemini keys are at their quota (next slot in {wait:.0f}s)")
+            await asyncio.sleep(min(wait, 1.0) or 0.05)
+
+    def _state(self, key):
+        for s in self._states:
+            if s.key == key:
+                return s
+        return None
+
+    def report_success(self, lease, tokens_used=None):
+        """
+        Records the real token usage (if known) and clears the key's error streak.
+        """
+        with self._lock:
+            if tokens_used is not None:
+                lease._entry[1] = tokens_used
+            state = self._state(lease.key)
+            if state:
+                state.quota_errors = 0
+
+    def report_quota_error(self, lease):
+        """
+        Cools the key down with exponential backoff so traffic moves to the others.
+        """
+        with self._lock:
+            state = self._state(lease.key)
+            if state:
+                state.quota_errors += 1
+                backoff = self.cooldown_seconds * (2 ** (state.quota_errors - 1))
+                state.cooldown_until = time.time() + min(backoff, self.max_cooldown_seconds)
+
+    def stats(self):
+        with self._lock:
+            now = time.time()
+            rows = []
+            for s in self._states:
+                s.prune(now)
+                rows.append({
+                    "key": f"{s.key[:6]}...{s.key[-4:]}",
+                    "requests_last_minute": len(s.minute),
+                    "tokens_last_minute": sum(e[1] for e in s.minute),
+                    "requests_last_day": len(s.day),
+                    "cooling_down_for": max(0, int(s.cooldown_until - now)),
+                    "total_requests": s.total_requests,
+                })
+            return rows
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_key_pool(keys):
+    """
+    Process-wide pool per key set, so budgets are shared by every session.
+    """
+    keys = tuple(parse_keys(keys))
+    if keys not in _pools:
+        with _pools_lock:
+            if keys not in _pools:
+                _pools[keys] = GeminiKeyPool(keys)
+    return _pools[keys]
@@ -0,0 +1,134 @@
+import math
+import re
+from collections import Counter
+import numpy as np
+
+class LinearScorer:
+    """
+    Scores cleaned text with a binary linear model over TF-IDF features without building
+    a sparse matrix. Each article is tokenized once, its n-grams are counted, and every
+    known term adds tf*idf*coef to a running dot product. The L2 norm is accumulated
+    alongside, so the normalised margin is dot / sqrt(sum((tf*idf)^2)) + intercept,
+    exactly what vectorizer.transform + decision_function compute.
+    """
+    def __init__(self, weights, intercept, classes, analyzer):
+        # term -> (idf, idf * coef)
+        self.weights = weights
+        self.intercept = float(intercept)
+        self.classes_ = np.array(classes)
+        self.lowercase = analyzer["lowercase"]
+        self.token_re = re.compile(analyzer["token_pattern"])
+        self.min_n, self.max_n = analyzer["ngram_range"]
+        self.stop_words = frozenset(analyzer["stop_words"])
+        self.norm = analyzer["norm"]
+        self.sublinear_tf = analyzer["sublinear_tf"]
+
+    @classmethod
+    def from_sklearn(cls, model, vectorizer):
+        if vectorizer.analyzer != "word" or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None or vectorizer.strip_accents or vectorizer.binary:
+            raise ValueError("LinearScorer only supports the default word analyzer")
+        if model.coef_.shape[0] != 1:
+            raise ValueError("LinearScorer only supports binary linear models")
+
+        coef = np.asarray(model.coef_[0], dtype=np.float64)
+        idf = np.asarray(vectorizer.idf_, dtype=np.float64) if vectorizer.use_idf else np.ones_like(coef)
+        weights = {term: (float(idf[i]), float(idf[i] * coef[i])) for term, i in vectorizer.vocabulary_.items()}
+        stop_words = vectorizer.get_stop_words()
+        analyzer = {
+            "lowercase": bool(vectorizer.lowercase),
+            "token_pattern": vectorizer.token_pattern,
+            "ngram_range": list(vectorizer.ngram_range),
+            "stop_words": stop_words or [],
+            "norm": vectorizer.norm,
+            "sublinear_tf": bool(vectorizer.sublinear_tf),
+        }
+        return cls(weights, model.intercept_[0], model.classes_, analyzer)
+
+    @classmethod
+    def from_compact(cls, classifier, vectorizer):
+        """
+        Builds the scorer from a pair returned by utils.compact_model.load_compact_model.
+        """
+        return CompactLinearScorer(classifier, vectorizer)
+
+    @classmethod
+    def from_pair(cls, classifier, vectorizer):
+        if hasattr(vectorizer, "vocabulary_"):
+            return cls.from_sklearn(classifier, vectorizer)
+        return cls.from_compact(classifier, vectorizer)
+
+    def _term_counts(self, doc):
+        if self.lowercase:
+            doc = doc.lower()
+        stop_words = self.stop_words
+        tokens = [t for t in self.token_re.findall(doc) if t not in stop_words]
+        counts = Counter(tokens) if self.min_n == 1 else Counter()
+        for n in range(max(self.min_n, 2), self.max_n + 1):
+            # Same n-grams as sklearn: built after stop-word removal, joined by single spaces
+            counts.update(map(" ".join, zip(*(tokens[i:] for i in range(n)))))
+        return counts
+
+    def score(self, doc):
+        """
+        Decision value for one cleaned document; positive leans towards classes_[1].
+        """
+        weights = self.weights
+        sublinear = self.sublinear_tf
+        dot = 0.0
+        norm_acc = 0.0
+        for term, tf in self._term_counts(doc).items():
+            entry = weights.get(term)
+            if entry is None:
+                continue
+            if sublinear:
+                tf = 1.0 + math.log(tf)
+            idf, weighted_coef = entry
+            dot += tf * weighted_coef
+            if self.norm == "l2":
+                w = tf * idf
+                norm_acc += w * w
+            elif self.norm == "l1":
+                norm_acc += abs(tf * idf)
+
+        if self.norm == "l2" and norm_acc:
+            dot /= math.sqrt(norm_acc)
+        elif self.norm == "l1" and norm_acc:
+            dot /= norm_acc
+        return dot + self.intercept
+
+    def decision_function(self, docs):
+        return np.fromiter((self.score(d) for d in docs), dtype=np.float64)
+
+    def predict(self, docs):
+        return self.classes_[(self.decision_function(docs) > 0).astype(np.intp)]
+
+class CompactLinearScorer(LinearScorer):
+    """
+    LinearScorer over a memory-mapped compact model. Terms are resolved with the
+    vectorizer's own hash table and idf/coef are read straight from the mapped
+    arrays, so the weights stay shared in the page cache instead of being copied
+    into a per-process dict.
+    """
+    def __init__(self, classifier, vectorizer):
+        self.vectorizer = vectorizer
+        self.coef = classifier.coef
+        self.intercept = float(classifier.intercept_[0])
+        self.classes_ = np.array(classifier.classes_)
+        self.norm = vectorizer.norm
+        self.sublinear_tf = vectorizer.sublinear_tf
+
+    def score(self, doc):
+        counts = Counter(self.vectorizer.analyze(doc))
+        ids, found = self.vectorizer.lookup(list(counts))
+        ids = ids[found]
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))[found]
+        if self.sublinear_tf:
+            tf = 1.0 + np.log(tf)
+        values = tf * self.vectorizer.idf[ids].astype(np.float64)
+        dot = float(np.dot(values, self.coef[ids].astype(np.float64)))
+
+        if self.norm == "l2" and values.size:
+            dot /= math.sqrt(np.dot(values, values))
+        elif self.norm == "l1" and values.size:
+            dot /= np.abs(values).sum()
+        return dot + self.intercept
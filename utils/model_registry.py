@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+import joblib
+from utils.compact_model import load_compact_model
+from utils.linear_scorer import LinearScorer
+
+MODEL_FILE = "models/truthlens_model.pkl"
+VECTORIZER_FILE = "models/tfidf_vectorizer.pkl"
+CALIBRATOR_FILE = "models/truthlens_calibrator.pkl"
+COMPACT_MODEL_FILE = "models/truthlens_compact.bin"
+
+def current_rss_bytes():
+    """
+    Returns the resident set size of this process in bytes, or None if unknown.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe store for heavy artifacts (pickled models, Gemini clients).
+    Every Streamlit session shares one copy instead of unpickling on each rerun.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._artifacts = {}
+        self._load_info = {}
+        self._gemini_models = {}
+        # Key passed to genai.configure on SDKs without per-key clients
+        self._global_gemini_key = None
+        self._per_key_clients = None
+
+    def load(self, path, mmap_mode="r", loader=None):
+        """
+        Loads a joblib artifact once per process and returns the shared object.
+        NumPy arrays inside the pickle (idf weights, coefficients) are memory-mapped
+        read-only when possible, so every worker shares the same pages.
+        A custom `loader(path)` can be given for non-pickle formats.
+        Returns None if the file is missing or failed to load.
+        """
+        if path in self._artifacts:
+            return self._artifacts[path]
+
+        with self._lock:
+            # Another session may have loaded it while we waited
+            if path in self._artifacts:
+                return self._artifacts[path]
+
+            obj = None
+            error = None
+            rss_before = current_rss_bytes()
+            start = time.perf_counter()
+            if os.path.exists(path) and loader:
+                try:
+                    obj = loader(path)
+                except Exception as e:
+                    error = str(e)
+            elif os.path.exists(path):
+                try:
+                    obj = joblib.load(path, mmap_mode=mmap_mode)
+                except Exception as e:
+                    # Compressed pickles can't be memory-mapped, retry with a normal load
+                    try:
+                        obj = joblib.load(path)
+                    except Exception:
+                        error = str(e)
+            else:
+                error = "file not found"
+
+            rss_after = current_rss_bytes()
+            self._load_info[path] = {
+                "load_seconds": time.perf_counter() - start,
+                "rss_delta_bytes": (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+                "file_bytes": os.path.getsize(path) if os.path.exists(path) else 0,
+                "error": error,
+            }
+            self._artifacts[path] = obj
+            return obj
+
+    def load_local_model(self, model_file=MODEL_FILE, vectorizer_file=VECTORIZER_FILE, compact_file=COMPACT_MODEL_FILE):
+        """
+        Returns (classifier, vectorizer), or (None, None) if either is unavailable.
+        The compact artifact from train_model.py is preferred when present: it is
+        memory-mapped instead of unpickled, so cold start and per-worker RSS are smaller.
+        """
+        if compact_file and os.path.exists(compact_file):
+            first_load = compact_file not in self._artifacts
+            pair = self.load(compact_file, loader=load_compact_model)
+            if pair is not None:
+                if first_load:
+                    info = self.stats()
+                    print(f"✅ Compact ML Model Loaded ({info['load_seconds']:.2f}s, RSS {info['rss_mb']} MB)")
+                return pair
+            if first_load:
+                print(f"⚠️ Could not load compact model, falling back to pickles: {self._load_info[compact_file]['error']}")
+
+        first_load = model_file not in self._artifacts
+        model = self.load(model_file)
+        vectorizer = self.load(vectorizer_file)
+        if model is None or vectorizer is None:
+            if first_load and os.path.exists(model_file):
+                print(f"⚠️ Could not load local model: {self._load_info[model_file]['error'] or self._load_info[vectorizer_file]['error']}")
+            return None, None
+
+        if first_load:
+            info = self.stats()
+            print(f"✅ Local ML Model Loaded ({info['load_seconds']:.2f}s, RSS {info['rss_mb']} MB)")
+        return model, vectorizer
+
+    def load_scorer(self, classifier, vectorizer):
+        """
+        Returns the shared LinearScorer for a loaded (classifier, vectorizer) pair,
+        or None when the model is not a binary TF-IDF linear model.
+        """
+        cache_key = ("linear_scorer", id(classifier), id(vectorizer))
+        if cache_key in self._artifacts:
+            return self._artifacts[cache_key]
+        with self._lock:
+            if cache_key not in self._artifacts:
+                try:
+                    scorer = LinearScorer.from_pair(classifier, vectorizer)
+                except Exception as e:
+                    print(f"⚠️ Fast scorer unavailable, using the vectorizer path: {e}")
+                    scorer = None
+                self._artifacts[cache_key] = scorer
+            return self._artifacts[cache_key]
+
+    def supports_per_key_clients(self):
+        """
+        True if the installed google-generativeai SDK can build a client per API key.
+        Without it every model shares the global genai.configure key, so rotating keys does nothing.
+        """
+        if self._per_key_clients is None:
+            try:
+                import google.generativeai as genai
+                self._per_key_clients = hasattr(genai.client, "_ClientManager")
+            except Exception:
+                self._per_key_clients = False
+        return self._per_key_clients
+
+    def get_gemini_model(self, api_key, model_name):
+        """
+        Returns a shared GenerativeModel bound to `api_key`.
+        Each key gets its own client instead of the global genai.configure,
+        so several keys can be used side by side (see utils/key_pool.py).
+        On SDKs without per-key clients the global key is used, and asking for a
+        second key raises instead of silently calling Gemini with the first one.
+        """
+        cache_key = (api_key, model_name)
+        if cache_key in self._gemini_models:
+            return self._gemini_models[cache_key]
+
+        import google.generativeai as genai
+        with self._lock:
+            if cache_key not in self._gemini_models:
+                model = genai.GenerativeModel(model_name)
+                if self.supports_per_key_clients():
+                    manager = genai.client._ClientManager()
+                    manager.configure(api_key=api_key)
+                    model._client = manager.make_client("generative")
+                    model._async_client = manager.make_client("generative_async")
+                else:
+                    if self._global_gemini_key not in (None, api_key):
+                        raise RuntimeError("This google-generativeai version cannot use several API keys in one process; configure a single Gemini key.")
+                    genai.configure(api_key=api_key)
+                    self._global_gemini_key = api_key
+                self._gemini_models[cache_key] = model
+            return self._gemini_models[cache_key]
+
+    def stats(self):
+        """
+        Summary of load cost: total load time, per-file details and current RSS.
+        """
+        rss = current_rss_bytes()
+        return {
+            "load_seconds": sum(i["load_seconds"] for i in self._load_info.values()),
+            "rss_mb": round(rss / (1024 * 1024), 1) if rss is not None else None,
+            "artifacts": dict(self._load_info),
+        }
+
+    def clear(self):
+        """
+        Drops every cached artifact so the next call reloads from disk (e.g. after retraining).
+        """
+        with self._lock:
+            self._artifacts.clear()
+            self._load_info.clear()
+            self._gemini_models.clear()
+            self._global_gemini_key = None
+
+_registry = ModelRegistry()
+
+def get_registry():
+    return _registry
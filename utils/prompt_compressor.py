@@ -0,0 +1,84 @@
+import re
+from utils.rate_limiter import estimate_tokens
+
+# Split after ., ! or ? (optionally followed by a closing quote) when the next sentence starts
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])["”’\']?\s+(?=["“‘\'(]?[A-Z0-9])')
+BOILERPLATE = re.compile(
+    r'\b(subscribe|sign up|newsletters?|cookies?|all rights reserved|click here|read more|'
+    r'follow us|advertisements?|share this|privacy policy|terms of (use|service)|'
+    r'download (our|the) app|log ?in|related articles|copyright)\b',
+    re.I
+)
+MIN_SENTENCE_CHARS = 25
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_SPLIT.split(text) if s and s.strip()]
+
+def _normalise(sentence):
+    return re.sub(r'\W+', ' ', sentence.lower()).strip()
+
+def dedupe_sentences(sentences, drop_noise=True):
+    """
+    Drops exact/near-exact repeats (ignoring case and punctuation), keeping the first
+    occurrence. With `drop_noise`, very short sentences and boilerplate lines go too.
+    The lead sentence (usually the headline) is always kept.
+    """
+    kept = []
+    seen = set()
+    for i, sentence in enumerate(sentences):
+        key = _normalise(sentence)
+        if not key or key in seen:
+            continue
+        if drop_noise and i > 0 and (len(sentence) < MIN_SENTENCE_CHARS or (BOILERPLATE.search(sentence) and len(sentence) < 200)):
+            continue
+        seen.add(key)
+        kept.append(sentence)
+    return kept
+
+def _informativeness(sentences, vectorizer, clean_fn):
+    """
+    One score per sentence: the summed TF-IDF weight of its terms, using the
+    vectorizer the local model was trained with. Falls back to distinct-word counts.
+    """
+    if vectorizer is not None:
+        try:
+            matrix = vectorizer.transform([clean_fn(s) for s in sentences])
+            return [float(v) for v in matrix.sum(axis=1).A1]
+        except Exception:
+            pass
+    return [float(len(set(_normalise(s).split()))) for s in sentences]
+
+def compress_article(text, vectorizer=None, token_budget=1000, clean_fn=_normalise):
+    """
+    Builds the article part of the prompt within `token_budget` tokens.
+    An article that already fits is passed through untouched. Otherwise repeats are
+    removed, then short and boilerplate lines; if it still does not fit, the most
+    informative sentences are kept (in their original order) instead of
+    blindly cutting the text at a fixed length.
+    """
+    sentences = split_sentences(text or "")
+    for stage in (sentences, dedupe_sentences(sentences, drop_noise=False), dedupe_sentences(sentences)):
+        sentences = stage
+        joined = " ".join(sentences)
+        if estimate_tokens(joined) <= token_budget:
+            return joined
+
+    scores = _informativeness(sentences, vectorizer, clean_fn)
+    # Lead sentence carries the headline/claim, keep it regardless of score
+    ranked = [0] + sorted(range(1, len(sentences)), key=lambda i: scores[i], reverse=True)
+
+    chosen = []
+    used = 0
+    for i in ranked:
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost > token_budget:
+            if i == 0:
+                # A single huge lead sentence: fall back to trimming it
+                chosen.append(i)
+                used = token_budget
+            continue
+        chosen.append(i)
+        used += cost
+
+    compressed = " ".join(sentences[i] for i in sorted(chosen))
+    return compressed[:token_budget * 4]
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+import weakref
+
+# Free tier limits (Gemini API), same numbers check_api_quota.py reports
+FREE_TIER_RPM = 15
+FREE_TIER_RPD = 1500
+FREE_TIER_TPM = 1_000_000
+
+def estimate_tokens(text):
+    """
+    Rough token estimate (~4 characters per token for English text).
+    """
+    return max(1, len(text) // 4)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`.
+    Callers reserve tokens up front (the balance may go negative) and then wait
+    out the debt, so waiters are served in arrival order from sync and async code alike.
+    """
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self, amount=1):
+        wait = self._reserve(amount)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, amount=1):
+        wait = self._reserve(amount)
+        if wait:
+            await asyncio.sleep(wait)
+
+class GeminiRateLimiter:
+    """
+    Combines request-per-minute and token-per-minute buckets with a bound on
+    in-flight async calls, so many requests can be outstanding without tripping 429s.
+    """
+    def __init__(self, rpm=FREE_TIER_RPM, tpm=FREE_TIER_TPM, max_concurrency=8):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        # asyncio primitives belong to one event loop; Streamlit reruns may create new ones
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def acquire(self, token_estimate):
+        self.requests.acquire(1)
+        self.tokens.acquire(token_estimate)
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = sem
+        return sem
+
+    def slot(self, token_estimate):
+        """
+        Async context manager: `async with limiter.slot(n): ...`
+        """
+        return _Slot(self, token_estimate)
+
+class _Slot:
+    def __init__(self, limiter, token_estimate):
+        self.limiter = limiter
+        self.token_estimate = token_estimate
+        self.sem = None
+
+    async def __aenter__(self):
+        self.sem = self.limiter._semaphore()
+        await self.sem.acquire()
+        try:
+            await self.limiter.requests.acquire_async(1)
+            await self.limiter.tokens.acquire_async(self.token_estimate)
+        except BaseException:
+            self.sem.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.sem.release()
+        return False
@@ -0,0 +1,130 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from utils.blob_store import content_id
+from utils.report_generator import generate_pdf_report
+
+REPORT_CACHE_ITEMS = 256
+REPORT_CACHE_BYTES = 64 * 1024 * 1024
+REPORT_WORKERS = 2
+
+def report_key(record_id, article_text=None, analysis=None, blob_id=None):
+    """
+    Cache key for one record's report: its id plus a hash of the article and analysis.
+    History records already carry that hash as their blob_id.
+    """
+    if blob_id is None:
+        blob_id = content_id({"article_full": article_text, "full_analysis": analysis})
+    return f"{record_id}:{blob_id}"
+
+class ReportCache:
+    """
+    Bounded LRU of rendered PDF bytes, filled by a small background thread pool
+    so FPDF layout never runs on the Streamlit script thread. Each key is rendered
+    at most once at a time; concurrent requests share the same Future.
+    """
+    def __init__(self, max_items=REPORT_CACHE_ITEMS, max_bytes=REPORT_CACHE_BYTES, workers=REPORT_WORKERS, render=generate_pdf_report):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.render_fn = render
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-render")
+        self._lock = threading.Lock()
+        self._reports = OrderedDict()
+        self._errors = OrderedDict()
+        self._pending = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Rendered bytes, or None if the report is not ready (yet).
+        """
+        with self._lock:
+            pdf_bytes = self._reports.get(key)
+            if pdf_bytes is not None:
+                self._reports.move_to_end(key)
+                self.hits += 1
+            return pdf_bytes
+
+    def error(self, key):
+        with self._lock:
+            return self._errors.get(key)
+
+    def is_pending(self, key):
+        """
+        True while the report is queued or rendering.
+        """
+        with self._lock:
+            return key in self._pending
+
+    def submit(self, key, load):
+        """
+        Queues a render unless the report is cached or already rendering.
+        `load()` runs on the worker and returns (article_text, analysis), so blob reads
+        happen off the UI thread too. Returns a Future resolving to the PDF bytes.
+        """
+        with self._lock:
+            if key in self._reports:
+                self._reports.move_to_end(key)
+                self.hits += 1
+                done = Future()
+                done.set_result(self._reports[key])
+                return done
+            if key in self._pending:
+                return self._pending[key]
+            self.misses += 1
+            self._errors.pop(key, None)
+            future = self._pool.submit(self._render, key, load)
+            self._pending[key] = future
+            return future
+
+    def _render(self, key, load):
+        try:
+            article_text, analysis = load()
+            if not article_text or not analysis:
+                raise ValueError("No stored article/analysis for this report")
+            pdf_bytes = self.render_fn(article_text, analysis)
+        except Exception as e:
+            with self._lock:
+                self._pending.pop(key, None)
+                self._errors[key] = str(e)
+                while len(self._errors) > self.max_items:
+                    self._errors.popitem(last=False)
+            raise
+
+        with self._lock:
+            self._pending.pop(key, None)
+            self._reports[key] = pdf_bytes
+            self._bytes += len(pdf_bytes)
+            # Evict least recently used reports beyond either bound
+            while self._reports and (len(self._reports) > self.max_items or self._bytes > self.max_bytes):
+                _, evicted = self._reports.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+        return pdf_bytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "items": len(self._reports),
+                "bytes": self._bytes,
+                "pending": len(self._pending),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+_report_cache = None
+_report_cache_lock = threading.Lock()
+
+def get_report_cache():
+    """
+    One cache and render pool per process, shared by every session.
+    """
+    global _report_cache
+    with _report_cache_lock:
+        if _report_cache is None:
+            _report_cache = ReportCache()
+        return _report_cache
@@ -0,0 +1,98 @@
+import csv
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from utils.blob_store import BlobStore, BLOB_DIR
+from utils.history_store import load_details
+from utils.report_generator import generate_pdf_report
+
+# Records fetched from the history store per query
+EXPORT_PAGE_SIZE = 500
+
+def report_filename(record):
+    verdict = re.sub(r'[^A-Za-z0-9]+', '-', str(record.get('verdict', 'Unknown'))).strip('-') or "Unknown"
+    return f"{record.get('timestamp', '')[:10] or 'undated'}_{record['id']}_{verdict}.pdf"
+
+def render_record(record, blob_dir=BLOB_DIR):
+    """
+    Worker task: loads one record's article + analysis from the blob store and renders its PDF.
+    Returns (record, pdf_bytes or None, error or None). Runs in a pool process, so only the
+    slim record travels to the worker and only the finished PDF comes back.
+    """
+    try:
+        details = load_details(record, BlobStore(blob_dir))
+        if not details.get('article_full') or not details.get('full_analysis'):
+            return record, None, "no stored article/analysis"
+        return record, generate_pdf_report(details['article_full'], details['full_analysis']), None
+    except Exception as e:
+        return record, None, str(e)
+
+def iter_records(stats_manager, filters=None, page_size=EXPORT_PAGE_SIZE):
+    """
+    Yields matching index records page by page, newest first. An `until` bound is pinned
+    to the start of the export so records logged meanwhile do not shift the pages.
+    """
+    filters = dict(filters or {})
+    filters.setdefault("until", datetime.now().isoformat())
+    offset = 0
+    while True:
+        page = stats_manager.list_history(offset=offset, limit=page_size, filters=filters)
+        yield from page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+def export_reports(stats_manager, out, filters=None, workers=None, progress=None):
+    """
+    Renders the PDF of every history record matching `filters` and writes them into a ZIP
+    (`out` is a path or a binary file object), plus an index.csv listing each record.
+    PDFs are rendered across a process pool and written to the archive as they complete;
+    at most ~2 per worker are in flight, so memory stays flat however many reports are exported.
+    Returns {"exported", "skipped"}.
+    """
+    workers = workers or os.cpu_count() or 1
+    blob_dir = stats_manager.store.blob_store.root
+    max_in_flight = workers * 2
+    index_rows = []
+    exported = skipped = 0
+
+    def write_result(zf, record, pdf_bytes, error):
+        nonlocal exported, skipped
+        if pdf_bytes is None:
+            skipped += 1
+            index_rows.append([record['id'], record.get('timestamp', ''), record.get('verdict', ''), record.get('score', ''), "", error])
+        else:
+            name = report_filename(record)
+            # PDFs are already compressed internally; storing them avoids a second pass
+            zf.writestr(name, pdf_bytes, compress_type=zipfile.ZIP_STORED)
+            exported += 1
+            index_rows.append([record['id'], record.get('timestamp', ''), record.get('verdict', ''), record.get('score', ''), name, ""])
+        if progress:
+            progress(exported, skipped)
+
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        if workers <= 1:
+            for record in iter_records(stats_manager, filters):
+                write_result(zf, *render_record(record, blob_dir))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = set()
+                for record in iter_records(stats_manager, filters):
+                    if len(in_flight) >= max_in_flight:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            write_result(zf, *future.result())
+                    in_flight.add(pool.submit(render_record, record, blob_dir))
+                for future in wait(in_flight).done:
+                    write_result(zf, *future.result())
+
+        index = io.StringIO()
+        writer = csv.writer(index)
+        writer.writerow(["id", "timestamp", "verdict", "score", "file", "error"])
+        writer.writerows(sorted(index_rows, key=lambda row: row[1], reverse=True))
+        zf.writestr("index.csv", index.getvalue())
+
+    return {"exported": exported, "skipped": skipped}
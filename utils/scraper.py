@@ -1,9 +1,23 @@
+import asyncio
+import queue
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+import aiohttp
 import requests
 from bs4 import BeautifulSoup
 import re
+from utils.http_cache import get_http_cache
+
+# scrape_many limits: total requests in flight, requests per host, and seconds per request
+MAX_CONCURRENT_REQUESTS = 16
+MAX_REQUESTS_PER_HOST = 4
+REQUEST_TIMEOUT = 15
 
 class NewsScraper:
-    def __init__(self):
+    def __init__(self, use_cache=True):
+        # Shared on-disk HTTP cache: repeat URLs are served or revalidated instead of re-downloaded
+        self.cache = get_http_cache() if use_cache else None
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -25,72 +39,193 @@ class NewsScraper:
         Returns a dictionary with title and body text.
         """
         try:
-            response = self.session.get(url, timeout=15)
+            entry = self.cache.lookup(url) if self.cache else None
+            if entry and self.cache.is_fresh(entry):
+                return {**entry["result"], "url": url}
+            
+            # Stale entry: ask the site whether it changed (ETag / Last-Modified)
+            headers = self.cache.conditional_headers(entry) if entry else {}
+            response = self.session.get(url, timeout=REQUEST_TIMEOUT, headers=headers)
+            if response.status_code == 304 and entry:
+                entry = self.cache.revalidated(url, entry, response.headers)
+                return {**entry["result"], "url": url}
+            
             # Handle strict blocking
             if response.status_code in [401, 403]:
-                return {
-                    "success": False, 
-                    "error": f"🔒 Access Denied by Site ({response.status_code}). This site has strict anti-bot protection. Please COPY & PASTE the text manually."
-                }
+                return self._blocked_result(response.status_code)
             
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Attempt to find the main article title
-            title = ""
-            if soup.find('h1'):
-                title = soup.find('h1').get_text(strip=True)
-            else:
-                title = soup.title.get_text(strip=True) if soup.title else "Unknown Title"
-
-            # ENHANCED: Multiple strategies to find article content
-            article_text = ""
-            
-            # Strategy 1: Look for common article containers
-            article_containers = soup.find_all(['article', 'main', 'div'], class_=re.compile(r'(article|story|content|post|body)', re.I))
-            if article_containers:
-                for container in article_containers:
-                    paragraphs = container.find_all('p')
-                    valid_paragraphs = [p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 30]
-                    if valid_paragraphs:
-                        article_text = " ".join(valid_paragraphs)
-                        break
-            
-            # Strategy 2: Fallback to all paragraphs (reduced filter to 30 chars)
-            if not article_text:
-                paragraphs = soup.find_all('p')
-                valid_paragraphs = [p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 30]
-                article_text = " ".join(valid_paragraphs)
-            
-            # Strategy 3: Last resort - get ALL text from body
-            if len(article_text) < 100:
-                body = soup.find('body')
-                if body:
-                    # Remove script and style elements
-                    for script in body(["script", "style", "nav", "header", "footer"]):
-                        script.decompose()
-                    article_text = body.get_text(separator=' ', strip=True)
-            
-            # Cleanup
-            article_text = re.sub(r'\s+', ' ', article_text).strip()
-            
-            # Final validation
-            if len(article_text) < 100:
-                return {
-                    "success": False,
-                    "error": "⚠️ Could not extract enough text. This site may use JavaScript to load content. Please COPY & PASTE the article text instead."
-                }
-            
-            return {
-                "success": True,
-                "title": title,
-                "text": article_text,
-                "url": url
-            }
+            result = self.parse_article(response.content, url)
+            if self.cache and response.status_code == 200:
+                self.cache.store(url, response.headers, result)
+            return result
             
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
+
+    def _blocked_result(self, status_code):
+        return {
+            "success": False, 
+            "error": f"🔒 Access Denied by Site ({status_code}). This site has strict anti-bot protection. Please COPY & PASTE the text manually."
+        }
+
+    def parse_article(self, content, url):
+        """
+        Extracts the title and article text from a downloaded page.
+        """
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # Attempt to find the main article title
+        title = ""
+        if soup.find('h1'):
+            title = soup.find('h1').get_text(strip=True)
+        else:
+            title = soup.title.get_text(strip=True) if soup.title else "Unknown Title"
+
+        # ENHANCED: Multiple strategies to find article content
+        article_text = ""
+        
+        # Strategy 1: Look for common article containers
+        article_containers = soup.find_all(['article', 'main', 'div'], class_=re.compile(r'(article|story|content|post|body)', re.I))
+        if article_containers:
+            for container in article_containers:
+                paragraphs = container.find_all('p')
+                valid_paragraphs = [p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 30]
+                if valid_paragraphs:
+                    article_text = " ".join(valid_paragraphs)
+                    break
+        
+        # Strategy 2: Fallback to all paragraphs (reduced filter to 30 chars)
+        if not article_text:
+            paragraphs = soup.find_all('p')
+            valid_paragraphs = [p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 30]
+            article_text = " ".join(valid_paragraphs)
+        
+        # Strategy 3: Last resort - get ALL text from body
+        if len(article_text) < 100:
+            body = soup.find('body')
+            if body:
+                # Remove script and style elements
+                for script in body(["script", "style", "nav", "header", "footer"]):
+                    script.decompose()
+                article_text = body.get_text(separator=' ', strip=True)
+        
+        # Cleanup
+        article_text = re.sub(r'\s+', ' ', article_text).strip()
+        
+        # Final validation
+        if len(article_text) < 100:
+            return {
+                "success": False,
+                "error": "⚠️ Could not extract enough text. This site may use JavaScript to load content. Please COPY & PASTE the article text instead."
+            }
+        
+        return {
+            "success": True,
+            "title": title,
+            "text": article_text,
+            "url": url
+        }
+
+    async def _scrape_async(self, session, url, global_slots, host_slots, timeout):
+        try:
+            host = urlsplit(url).hostname or ""
+            entry = self.cache.lookup(url) if self.cache else None
+            if entry and self.cache.is_fresh(entry):
+                return {**entry["result"], "url": url}
+            headers = self.cache.conditional_headers(entry) if entry else {}
+
+            # Per-host slot first, so a busy host never holds a global slot while it waits
+            async with host_slots[host], global_slots:
+                # The deadline only starts once a slot is free
+                async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status == 304 and entry:
+                        entry = self.cache.revalidated(url, entry, response.headers)
+                        return {**entry["result"], "url": url}
+                    if response.status in [401, 403]:
+                        return {**self._blocked_result(response.status), "url": url}
+                    response.raise_for_status()
+                    content = await response.read()
+            # BeautifulSoup is CPU-bound: parse off the event loop
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, self.parse_article, content, url)
+            if self.cache and response.status == 200:
+                await loop.run_in_executor(None, self.cache.store, url, response.headers, result)
+            return {**result, "url": url}
+        except asyncio.TimeoutError:
+            return {"success": False, "error": f"⏱️ Timed out after {timeout}s", "url": url}
+        except Exception as e:
+            return {"success": False, "error": str(e), "url": url}
+
+    async def scrape_many_async(self, urls, max_concurrency=MAX_CONCURRENT_REQUESTS, per_host=MAX_REQUESTS_PER_HOST, timeout=REQUEST_TIMEOUT):
+        """
+        Async generator: scrapes every URL concurrently and yields one result dict
+        (same shape as scrape_url, plus "url") per unique URL as soon as it is ready.
+        At most `max_concurrency` requests run at once, at most `per_host` per site,
+        and each request gets `timeout` seconds.
+        """
+        global_slots = asyncio.Semaphore(max_concurrency)
+        host_slots = defaultdict(lambda: asyncio.Semaphore(per_host))
+        connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=per_host)
+        # aiohttp negotiates the encodings it can decode itself
+        headers = {k: v for k, v in self.session.headers.items() if k.lower() != 'accept-encoding'}
+
+        async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+            tasks = [
+                asyncio.ensure_future(self._scrape_async(session, url, global_slots, host_slots, timeout))
+                for url in dict.fromkeys(urls)
+            ]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    yield await next_done
+            finally:
+                # Consumer stopped early: do not leave requests running
+                for task in tasks:
+                    task.cancel()
+
+    def scrape_many(self, urls, **limits):
+        """
+        Synchronous version of scrape_many_async for Streamlit and scripts: yields results
+        in completion order, so a batch takes about as long as its slowest page.
+        The event loop runs in a helper thread; closing the generator early (break,
+        exception) cancels the requests still in flight and waits for the thread.
+        """
+        results = queue.Queue()
+        finished = object()
+        errors = []
+        running = {}
+
+        async def pump():
+            running["loop"], running["task"] = asyncio.get_running_loop(), asyncio.current_task()
+            try:
+                async for result in self.scrape_many_async(urls, **limits):
+                    results.put(result)
+            except asyncio.CancelledError:
+                pass  # Consumer stopped early
+            except Exception as e:
+                errors.append(e)
+            finally:
+                results.put(finished)
+
+        thread = threading.Thread(target=asyncio.run, args=(pump(),), name="scrape-many", daemon=True)
+        thread.start()
+        try:
+            while True:
+                result = results.get()
+                if result is finished:
+                    break
+                yield result
+        finally:
+            # Set before the first result, so always there once the consumer can stop
+            if thread.is_alive() and running:
+                try:
+                    running["loop"].call_soon_threadsafe(running["task"].cancel)
+                except RuntimeError:
+                    pass  # Loop already closed: the batch had finished
+            thread.join()
+        if errors:
+            raise errors[0]
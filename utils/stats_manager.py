@@ -2,17 +2,68 @@ import json
 import os
 import streamlit as st
 import datetime
+from utils.history_store import get_history_store, load_details, FSYNC_INTERVAL
+from utils.blob_store import BlobStore, BLOB_DIR
+from utils.history_writer import get_history_writer, get_store_lock
 
-STATS_FILE = "data/history.json"
+# "sqlite" (indexed, paginated queries) or "jsonl" (plain append-only log)
+HISTORY_BACKEND = os.getenv("TRUTHLENS_HISTORY_BACKEND", "sqlite")
+HISTORY_DB = "data/history.db"
+STATS_FILE = "data/history.jsonl"
+# Pre-JSONL history (one JSON array rewritten on every analysis), migrated once on startup
+LEGACY_STATS_FILE = "data/history.json"
+
+def _read_legacy(path):
+    """
+    Records from an older history file: a JSON array (history.json) or JSON Lines.
+    """
+    if path.endswith(".jsonl"):
+        records = list(get_history_store("jsonl", path).iter_records())
+        for record in records:
+            record.pop("id", None)
+        return records
+    with open(path, "r") as f:
+        return json.load(f)
 
 class StatsManager:
-    def __init__(self):
-        if not os.path.exists("data"):
-            os.makedirs("data")
-        if not os.path.exists(STATS_FILE):
-             with open(STATS_FILE, "w") as f:
-                 json.dump([], f)
-    
+    def __init__(self, backend=HISTORY_BACKEND, path=None, fsync="interval", fsync_interval=FSYNC_INTERVAL, blob_dir=BLOB_DIR):
+        options = {"blob_store": BlobStore(blob_dir)}
+        if backend == "sqlite":
+            path = path or HISTORY_DB
+        else:
+            path = path or STATS_FILE
+            options.update(fsync=fsync, fsync_interval=fsync_interval)
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self.store = get_history_store(backend, path, **options)
+        # All sessions in this process share one queue-fed writer thread
+        self.writer = get_history_writer(self.store)
+        if not self.store.exists():
+            with get_store_lock(self.store):
+                # Re-checked under the lock: another worker may have just migrated
+                if not self.store.exists():
+                    self._migrate_legacy([p for p in (STATS_FILE, LEGACY_STATS_FILE) if os.path.abspath(p) != os.path.abspath(path)])
+
+    def _migrate_legacy(self, sources):
+        """
+        One-time import of the newest older history file into the current store.
+        The source is kept as <name>.migrated so it is never imported twice.
+        """
+        for source in sources:
+            if not os.path.exists(source):
+                continue
+            try:
+                records = _read_legacy(source)
+            except Exception as e:
+                print(f"⚠️ Could not migrate {source}: {e}")
+                return
+            self.store.append_many(records)
+            os.replace(source, f"{source}.migrated")
+            print(f"✅ Migrated {len(records)} history records from {source}")
+            return
+
     def log_analysis(self, result, article_text=""):
         """
         Saves a complete record of the analysis including article text.
@@ -25,41 +76,73 @@ class StatsManager:
             "bias": result.get('bias_analysis', {}).get('political_spectrum', 'Neutral'),
             "summary": result.get('summary', 'No summary available'),
             "article_snippet": article_text[:300] + "..." if len(article_text) > 300 else article_text,
+            # Moved into the compressed blob store; the index keeps only a blob_id
             "article_full": article_text,  # Store full text for PDF regeneration
             "full_analysis": result  # Store complete analysis for report generation
         }
-        
-        try:
-            with open(STATS_FILE, "r") as f:
-                history = json.load(f)
-            history.append(record)
-            with open(STATS_FILE, "w") as f:
-                json.dump(history, f, indent=2)
-        except:
-            pass # Fail silently in demo to avoid blocking UI
 
-    def get_stats(self):
+        # Queued for the background writer: no disk I/O on the UI thread,
+        # and failed writes are retried rather than silently dropped
+        self.writer.submit(record)
+
+    def flush(self, timeout=None):
+        """
+        Waits until every queued record has been written.
+        """
+        return self.writer.flush(timeout)
+
+    def list_history(self, offset=0, limit=20, filters=None):
+        """
+        One page of slim index records (no article_full / full_analysis), newest first.
+        `filters` may hold verdict, bias (a value or a list), is_clickbait, and since/until ISO timestamps.
+        """
+        return self.store.list_history(offset=offset, limit=limit, filters=filters)
+
+    def count(self, filters=None):
+        return self.store.count(filters)
+
+    def get_record(self, record_id):
+        return self.store.get_record(record_id)
+
+    def get_details(self, record):
+        """
+        Loads {"article_full", "full_analysis"} for an index record,
+        e.g. when it is expanded or its PDF is requested.
+        """
+        return load_details(record, self.store.blob_store)
+
+    def get_aggregates(self, filters=None):
+        """
+        {"total", "score_sum", "clickbait", "verdicts": {verdict: n}, "bias": {bias: n}}
+        """
+        return self.store.aggregates(filters)
+
+    def get_stats(self, include_history=True):
         try:
-            with open(STATS_FILE, "r") as f:
-                data = json.load(f)
-            
-            if not data:
+            aggregates = self.get_aggregates()
+            total = aggregates["total"]
+
+            if not total:
                 return None
-                
-            total = len(data)
-            fake_count = sum(1 for x in data if "Unreliable" in x['verdict'] or "Questionable" in x['verdict'])
-            real_count = sum(1 for x in data if "Reliable" in x['verdict'])
-            satire_count = sum(1 for x in data if "Satire" in x['verdict'])
-            
-            avg_score = sum(x['score'] for x in data) / total if total > 0 else 0
-            
-            return {
+
+            verdicts = aggregates["verdicts"].items()
+            fake_count = sum(n for v, n in verdicts if "Unreliable" in v or "Questionable" in v)
+            real_count = sum(n for v, n in verdicts if "Reliable" in v)
+            satire_count = sum(n for v, n in verdicts if "Satire" in v)
+
+            avg_score = aggregates["score_sum"] / total if total > 0 else 0
+
+            stats = {
                 "total": total,
                 "fake": fake_count,
                 "real": real_count,
                 "satire": satire_count,
                 "avg_score": int(avg_score),
-                "history": data # Return full list for charts
+                "bias": aggregates["bias"],
             }
+            if include_history:
+                # Full list, oldest first; prefer list_history() for anything paginated
+                stats["history"] = list(reversed(self.list_history(limit=None)))
+            return stats
         except:
             return None
@@ -0,0 +1,92 @@
+import json
+
+class IncrementalJSONParser:
+    """
+    Consumes a streamed JSON object chunk by chunk and reports each top-level
+    field the moment its value is complete, e.g. "credibility_score" long before
+    "key_entities" has finished arriving.
+    Anything before the first '{' (such as a ```json fence) and after the closing '}' is ignored.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.phase = "start" # start -> key -> colon -> value -> ... -> done
+        self.key_start = None
+        self.current_key = None
+        self.value_start = None
+        self.fields = {}
+
+    @property
+    def done(self):
+        return self.phase == "done"
+
+    def feed(self, chunk):
+        """
+        Adds a chunk and returns a list of (key, value) pairs completed by it.
+        """
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+
+        while self.pos < len(buf) and self.phase != "done":
+            ch = buf[self.pos]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.phase == "key":
+                        self.current_key = json.loads(buf[self.key_start:self.pos + 1])
+                        self.phase = "colon"
+                self.pos += 1
+                continue
+
+            if self.phase == "start":
+                if ch == "{":
+                    self.depth = 1
+                    self.phase = "key"
+            elif ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.phase == "key":
+                    self.key_start = self.pos
+            elif ch == ":" and self.depth == 1 and self.phase == "colon":
+                self.phase = "value"
+                self.value_start = self.pos + 1
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                if self.depth == 1 and ch == "}":
+                    if self.phase == "value":
+                        self._complete(buf[self.value_start:self.pos], completed)
+                    self.depth = 0
+                    self.phase = "done"
+                else:
+                    self.depth -= 1
+            elif ch == "," and self.depth == 1 and self.phase == "value":
+                self._complete(buf[self.value_start:self.pos], completed)
+                self.phase = "key"
+
+            self.pos += 1
+
+        return completed
+
+    def _complete(self, raw_value, completed):
+        try:
+            value = json.loads(raw_value.strip())
+        except ValueError:
+            return # Malformed field; the final full parse will report it
+        self.fields[self.current_key] = value
+        completed.append((self.current_key, value))
+
+    def result(self):
+        """
+        Parses the whole accumulated response, the same way the non-streaming path does.
+        """
+        raw_text = self.buffer.replace("```json", "").replace("```", "").strip()
+        return json.loads(raw_text)
@@ -0,0 +1,74 @@
+import os
+import re
+import string
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump when clean_text's output changes; keys cached training artifacts
+NORMALIZER_VERSION = "1"
+
+# Compiled once at import instead of on every call
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+HTML_TAG_PATTERN = re.compile(r'<.*?>')
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+# Below this many texts per chunk, process start-up and pickling cost more than they save
+MIN_PARALLEL_CHUNK = 1000
+
+def clean_text(text):
+    """
+    Standardizes text: lowercase, removes URLs, HTML tags, punctuation and extra spaces.
+    Shared by training and inference so both see exactly the same tokens.
+    Output is byte-identical to the original five re.sub passes (see verify_normalizer.py).
+    """
+    if not isinstance(text, str):
+        return ""
+
+    text = text.lower()
+    # Cheap substring checks skip the regex scan for the common case (no URLs / tags)
+    if 'http' in text or 'www.' in text:
+        text = URL_PATTERN.sub('', text)
+    if '<' in text:
+        text = HTML_TAG_PATTERN.sub('', text)
+    text = text.translate(PUNCTUATION_TABLE)
+    # str.split() and re's \s agree on what whitespace is, newlines included
+    return ' '.join(text.split())
+
+def clean_batch(texts):
+    """
+    Cleans a list (returns a list) or a pandas Series (returns a Series with the same index).
+    """
+    cleaner = clean_text
+    cleaned = [cleaner(t) for t in texts]
+    if hasattr(texts, 'index') and hasattr(texts, 'name'):
+        return texts.__class__(cleaned, index=texts.index, name=texts.name)
+    return cleaned
+
+def clean_parallel(texts, workers=None, chunk_size=None, pool=None):
+    """
+    Cleans a large list/Series across a process pool. Texts are sent in large chunks
+    to keep pickling overhead low, and results come back in input order, so the output
+    is identical to clean_batch. workers=1 (or a tiny input) runs in-process.
+    Pass an existing `pool` to reuse it across calls instead of starting one per call.
+    """
+    workers = workers or os.cpu_count() or 1
+    items = list(texts)
+    if workers <= 1 or len(items) < 2 * MIN_PARALLEL_CHUNK:
+        return clean_batch(texts)
+
+    if chunk_size is None:
+        # ~4 chunks per worker balances load without flooding the pool
+        chunk_size = max(MIN_PARALLEL_CHUNK, -(-len(items) // (workers * 4)))
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    cleaned = []
+    if pool is not None:
+        for part in pool.map(clean_batch, chunks):
+            cleaned.extend(part)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as own_pool:
+            # map() yields in submission order, keeping results deterministic
+            for part in own_pool.map(clean_batch, chunks):
+                cleaned.extend(part)
+
+    if hasattr(texts, 'index') and hasattr(texts, 'name'):
+        return texts.__class__(cleaned, index=texts.index, name=texts.name)
+    return cleaned
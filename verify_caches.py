@@ -0,0 +1,178 @@
+"""
+Behaviour check for the shared, concurrently used helpers: the Gemini key pool,
+the analysis cache, the scraper's HTTP cache and the streaming JSON parser.
+Runs offline, against temporary directories.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from utils.analysis_cache import AnalysisCache, make_cache_key
+from utils.http_cache import HttpCache, normalize_url, freshness_lifetime
+from utils.key_pool import GeminiKeyPool, QuotaExhausted, parse_keys
+from utils.stream_parser import IncrementalJSONParser
+
+failures = []
+
+def check(name, ok, detail=""):
+    print(f"   {'✅' if ok else '❌'} {name}{f' ({detail})' if detail and not ok else ''}")
+    if not ok:
+        failures.append(name)
+
+def run_threads(target, n=8):
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+def check_key_pool():
+    print("🔍 Key pool...")
+    check("blank key strings parse to no keys", parse_keys(" , ") == [] and parse_keys("a, b,a") == ["a", "b"])
+
+    pool = GeminiKeyPool(["key-a", "key-b", "key-c"], rpm=5, tpm=10**6, rpd=100)
+    leases = []
+    lock = threading.Lock()
+    def take(_):
+        lease = pool.acquire(tokens=10, max_wait=0)
+        with lock:
+            leases.append(lease.key)
+    run_threads(take, n=15)
+    spread = {k: leases.count(k) for k in pool.keys}
+    check("concurrent requests spread evenly over keys", spread == {"key-a": 5, "key-b": 5, "key-c": 5}, f"{spread}")
+    try:
+        pool.acquire(tokens=10, max_wait=0)
+        check("full pool raises QuotaExhausted", False)
+    except QuotaExhausted:
+        check("full pool raises QuotaExhausted", True)
+
+    pool = GeminiKeyPool(["key-a", "key-b"], rpm=100, tpm=10**6, rpd=1000)
+    pool.report_quota_error(pool.acquire(max_wait=0))
+    cooled = [row for row in pool.stats() if row["cooling_down_for"] > 0]
+    used = {pool.acquire(max_wait=0).key for _ in range(10)}
+    check("a key hitting its quota is skipped while cooling down", len(cooled) == 1 and len(used) == 1, f"{cooled}, {used}")
+
+def check_analysis_cache(tmp):
+    print("🔍 Analysis cache...")
+    cache_dir = os.path.join(tmp, "analysis")
+    cache = AnalysisCache(cache_dir, max_memory_items=8)
+    key = make_cache_key("some article", "v2", "model", 1000)
+    check("token budget is part of the key", key != make_cache_key("some article", "v2", "model", 500))
+
+    def worker(i):
+        for j in range(50):
+            k = make_cache_key(f"article {j}", "v2", "model")
+            if cache.get(k) is None:
+                cache.put(k, {"credibility_score": j})
+    run_threads(worker)
+    values = [cache.get(make_cache_key(f"article {j}", "v2", "model")) for j in range(50)]
+    check("concurrent get/put keeps every result", values == [{"credibility_score": j} for j in range(50)])
+
+    reopened = AnalysisCache(cache_dir)
+    check("disk tier survives a restart", reopened.get(make_cache_key("article 7", "v2", "model")) == {"credibility_score": 7})
+
+    expiring = AnalysisCache(os.path.join(tmp, "expiring"), ttl_seconds=0.05)
+    expiring.put(key, {"credibility_score": 1})
+    time.sleep(0.1)
+    check("expired entries are not served", expiring.get(key) is None)
+
+def check_http_cache(tmp):
+    print("🔍 HTTP cache...")
+    check("tracking parameters, fragments and default ports are ignored",
+          normalize_url("HTTPS://News.Example.com:443/a?b=2&utm_source=x&a=1#top") == normalize_url("https://news.example.com/a?a=1&b=2"))
+    check("query parameters that change the page are kept",
+          normalize_url("https://example.com/a?id=1") != normalize_url("https://example.com/a?id=2"))
+
+    now = time.time()
+    check("s-maxage wins over max-age", freshness_lifetime({"Cache-Control": "max-age=60, s-maxage=10"}, now) == 10)
+    check("no-cache means revalidate every time", freshness_lifetime({"Cache-Control": "no-cache, max-age=60"}, now) == 0)
+    check("Expires - Date", freshness_lifetime({"Date": "Mon, 01 Jan 2024 00:00:00 GMT", "Expires": "Mon, 01 Jan 2024 00:05:00 GMT"}, now) == 300)
+    check("Last-Modified heuristic is capped",
+          freshness_lifetime({"Date": "Mon, 01 Jan 2024 00:00:00 GMT", "Last-Modified": "Mon, 01 Jan 2001 00:00:00 GMT"}, now) == 24 * 3600)
+
+    cache = HttpCache(os.path.join(tmp, "http"))
+    article = {"success": True, "title": "T", "text": "body " * 100, "url": "https://example.com/a"}
+    cache.store("https://example.com/a", {"Cache-Control": "max-age=60", "ETag": '"v1"'}, article)
+    entry = cache.lookup("https://example.com/a?utm_campaign=z")
+    check("stored article is found under the normalised URL", entry is not None and entry["result"] == article)
+    check("fresh within max-age", entry is not None and cache.is_fresh(entry))
+    check("conditional headers carry the validator", cache.conditional_headers(entry) == {"If-None-Match": '"v1"'})
+
+    stale = {"Cache-Control": "max-age=0", "ETag": '"v1"'}
+    cache.store("https://example.com/b", stale, article)
+    entry = cache.lookup("https://example.com/b")
+    check("max-age=0 is stale", not cache.is_fresh(entry))
+    entry = cache.revalidated("https://example.com/b", entry, {"Cache-Control": "max-age=60"})
+    check("304 refreshes the entry", cache.is_fresh(cache.lookup("https://example.com/b")) and entry["etag"] == '"v1"')
+
+    # Servers often answer 304 with just the validator: the stored max-age still applies
+    cache.store("https://example.com/d", {"Cache-Control": "max-age=600", "ETag": '"v1"'}, article)
+    entry = cache.lookup("https://example.com/d")
+    entry = cache.revalidated("https://example.com/d", entry, {"ETag": '"v1"', "Date": "Mon, 01 Jan 2024 00:00:00 GMT"})
+    check("304 without Cache-Control keeps the stored max-age", entry["lifetime"] == 600, f"lifetime {entry['lifetime']}")
+    entry = cache.revalidated("https://example.com/d", entry, {"Cache-Control": "max-age=30"})
+    check("304 Cache-Control replaces the stored one", entry["lifetime"] == 30, f"lifetime {entry['lifetime']}")
+
+    check("no-store is not cached", not cache.store("https://example.com/c", {"Cache-Control": "no-store"}, article))
+    check("private is not cached", not cache.store("https://example.com/c", {"Cache-Control": "private, max-age=60"}, article))
+    check("failed extractions are not cached",
+          not cache.store("https://example.com/c", {"Cache-Control": "max-age=60"}, {"success": False, "error": "JS page"}))
+
+    before = cache.stats()
+    def worker(i):
+        for _ in range(200):
+            cache.lookup("https://example.com/missing")
+    run_threads(worker)
+    check("counters are exact under concurrent lookups", cache.stats()["misses"] - before["misses"] == 8 * 200)
+
+    small = HttpCache(os.path.join(tmp, "http_small"), max_bytes=20 * 1024)
+    for i in range(50):
+        small.store(f"https://example.com/{i}", {"Cache-Control": "max-age=60"}, article)
+    on_disk = sum(e.stat().st_size for e in os.scandir(small.cache_dir))
+    check("size bound is enforced by eviction", on_disk <= small.max_bytes and small.stats()["evictions"] > 0, f"{on_disk} bytes")
+    check("most recent entries survive eviction", small.lookup("https://example.com/49") is not None)
+
+def check_stream_parser():
+    print("🔍 Stream parser...")
+    analysis = {
+        "credibility_score": 42,
+        "classification": "Questionable",
+        "summary": "Quotes \"nested\" {braces} and [brackets], plus a comma, and unicode – é",
+        "clickbait_analysis": {"is_clickbait": True, "dissonance_score": 70, "reason": "}{"},
+        "fallacies": ["Ad hominem", "Straw man"],
+        "key_entities": [{"name": "A, B", "sentiment_score": -0.5, "type": "Org"}],
+        "fact_check_recommendation": "True",
+    }
+    text = "```json\n" + json.dumps(analysis, indent=2, ensure_ascii=False) + "\n```"
+    rng = random.Random(3)
+    ok = True
+    for _ in range(200):
+        parser = IncrementalJSONParser()
+        events = []
+        pos = 0
+        while pos < len(text):
+            size = rng.randint(1, 12)
+            events.extend(parser.feed(text[pos:pos + size]))
+            pos += size
+        ok = ok and events == list(analysis.items()) and parser.result() == analysis and parser.done
+    check("fields arrive complete and in order for any chunking", ok)
+
+    parser = IncrementalJSONParser()
+    first = parser.feed('{"credibility_score": 88, "summary": "still stream')
+    check("a field is reported as soon as it is complete", first == [("credibility_score", 88)])
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        check_key_pool()
+        check_analysis_cache(tmp)
+        check_http_cache(tmp)
+        check_stream_parser()
+
+    if failures:
+        print(f"FAILURE: {len(failures)} checks failed: {', '.join(failures)}")
+        sys.exit(1)
+    print("SUCCESS: key pool, caches and stream parser behave as expected")
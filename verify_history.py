@@ -0,0 +1,186 @@
+"""
+Behaviour check for the history pipeline: both history stores must keep exact running
+aggregates (even for malformed LLM scores), and the background HistoryWriter must commit,
+flush, retry transient errors and set aside records that can never be written.
+"""
+
+import errno
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from utils.blob_store import BlobStore
+from utils.history_store import SqliteHistoryStore, JsonlHistoryStore, empty_aggregates, add_to_aggregates
+from utils.history_writer import HistoryWriter
+
+failures = []
+
+def check(name, ok, detail=""):
+    print(f"   {'✅' if ok else '❌'} {name}{f' ({detail})' if detail and not ok else ''}")
+    if not ok:
+        failures.append(name)
+
+def make_records(n, start=0):
+    verdicts = ["Reliable", "Unreliable", "Questionable", "Satire"]
+    biases = ["Left", "Center", "Right", "Not evaluated"]
+    return [{
+        "timestamp": f"2024-01-01T00:{(start + i) // 60 % 60:02d}:{(start + i) % 60:02d}.{start + i:06d}",
+        "verdict": verdicts[i % 4],
+        "score": (start + i) % 101,
+        "is_clickbait": i % 3 == 0,
+        "bias": biases[i % 4],
+        "summary": f"record {start + i}",
+        "article_full": f"article {start + i}",
+        "full_analysis": {"credibility_score": (start + i) % 101},
+    } for i in range(n)]
+
+def expected_aggregates(records):
+    aggregates = empty_aggregates()
+    for record in records:
+        add_to_aggregates(aggregates, record)
+    return aggregates
+
+def check_store(name, store):
+    records = make_records(200)
+    # Scores arrive from the LLM: strings, junk and missing values must not break the totals
+    records += [
+        {"timestamp": "2024-02-01T00:00:00", "verdict": "Reliable", "score": "85"},
+        {"timestamp": "2024-02-01T00:00:01", "verdict": "Reliable", "score": "n/a"},
+        {"timestamp": "2024-02-01T00:00:02", "verdict": "Reliable", "score": None},
+        {"timestamp": "2024-02-01T00:00:03", "verdict": "Reliable", "score": float("nan")},
+    ]
+    store.append_many(records[:100])
+    store.append_many(records[100:])
+
+    expected = expected_aggregates(make_records(200))
+    expected["total"] += 4
+    expected["score_sum"] += 85
+    expected["verdicts"]["Reliable"] += 4
+    expected["bias"]["Neutral"] = 4
+    check(f"{name}: running aggregates", store.aggregates() == expected, f"{store.aggregates()} != {expected}")
+
+    scanned = store.aggregates({"since": "0000"})
+    check(f"{name}: filtered scan matches running totals", scanned == expected, f"{scanned}")
+    check(f"{name}: count", store.count() == 204 and store.count({"verdict": "Satire"}) == 50)
+    page = store.list_history(offset=0, limit=5)
+    check(f"{name}: newest first", [r["timestamp"] for r in page] == sorted((r["timestamp"] for r in records), reverse=True)[:5])
+    details = store.blob_store.get(store.list_history(0, 1, {"verdict": "Satire"})[0]["blob_id"])
+    check(f"{name}: heavy fields in the blob store", details and details["article_full"].startswith("article "))
+
+def open_store(path):
+    SqliteHistoryStore(path, blob_store=BlobStore(os.path.join(os.path.dirname(path), "blobs")))
+
+def check_counter_seeding(tmp):
+    # A database from before the counters table, opened by several processes at once
+    path = os.path.join(tmp, "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE analyses (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, verdict TEXT, "
+                 "score INTEGER, is_clickbait INTEGER, bias TEXT, summary TEXT, article_snippet TEXT, blob_id TEXT)")
+    conn.executemany("INSERT INTO analyses (timestamp, verdict, score, is_clickbait, bias) VALUES (?, 'Reliable', 50, 0, 'Center')",
+                     [(str(i),) for i in range(1000)])
+    conn.commit()
+    conn.close()
+    with multiprocessing.Pool(6) as pool:
+        pool.map(open_store, [path] * 6)
+    totals = SqliteHistoryStore(path, blob_store=BlobStore(os.path.join(tmp, "blobs"))).aggregates()
+    check("sqlite: counters seeded once by concurrent openers", totals["total"] == 1000 and totals["score_sum"] == 50000, f"{totals}")
+
+class FlakyStore:
+    """
+    Wraps a store and fails the first `failures` commits with `error` (a locked database by default).
+    """
+    def __init__(self, store, failures, error=None):
+        self.store = store
+        self.path = store.path
+        self.failures = failures
+        self.error = error or sqlite3.OperationalError("database is locked")
+        self.calls = 0
+
+    def append_many(self, records):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        self.store.append_many(records)
+
+def check_writer(tmp):
+    blobs = BlobStore(os.path.join(tmp, "writer_blobs"))
+
+    store = SqliteHistoryStore(os.path.join(tmp, "writer.db"), blob_store=blobs)
+    writer = HistoryWriter(store)
+    threads = [threading.Thread(target=lambda i=i: [writer.submit(r) for r in make_records(100, start=i * 100)]) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    check("writer: flush waits for every record", writer.flush(10) and store.count() == 800, f"{store.count()} stored")
+    check("writer: records are group-committed", writer.stats()["batches"] < 800, f"{writer.stats()}")
+
+    # One record the store can never accept must not hold back the others
+    store = SqliteHistoryStore(os.path.join(tmp, "bad.db"), blob_store=blobs)
+    writer = HistoryWriter(store)
+    good = make_records(10)
+    for record in good[:5] + [{"timestamp": None, "verdict": "Reliable"}] + good[5:]:
+        writer.submit(record)
+    start = time.monotonic()
+    flushed = writer.flush(10)
+    elapsed = time.monotonic() - start
+    check("writer: bad record does not block the queue", flushed and store.count() == 10, f"{store.count()} stored")
+    check("writer: bad record is set aside without retries", writer.stats()["rejected"] == 1 and elapsed < 0.5
+          and os.path.exists(writer.rejected_path), f"{writer.stats()} in {elapsed:.1f}s")
+    writer.submit(make_records(1, start=50)[0])
+    check("writer: keeps writing after a rejection", writer.flush(5) and store.count() == 11)
+
+    # Transient errors are retried until they clear, nothing is dropped
+    flaky = FlakyStore(SqliteHistoryStore(os.path.join(tmp, "flaky.db"), blob_store=blobs), failures=2)
+    writer = HistoryWriter(flaky)
+    for record in make_records(20):
+        writer.submit(record)
+    check("writer: transient errors are retried", writer.flush(10) and flaky.store.count() == 20 and writer.stats()["rejected"] == 0,
+          f"{writer.stats()}")
+
+    # A transient error that never clears ends in the dead-letter file, not an endless loop
+    flaky = FlakyStore(SqliteHistoryStore(os.path.join(tmp, "stuck.db"), blob_store=blobs), failures=10**6)
+    writer = HistoryWriter(flaky, max_retry_seconds=1.0)
+    for record in make_records(5):
+        writer.submit(record)
+    check("writer: retries stop after max_retry_seconds", writer.flush(10) and writer.stats()["rejected"] == 5, f"{writer.stats()}")
+
+    # An OS error that cannot clear by itself (here, permissions) is not retried
+    flaky = FlakyStore(SqliteHistoryStore(os.path.join(tmp, "denied.db"), blob_store=blobs), failures=10**6,
+                       error=PermissionError(errno.EACCES, "Permission denied"))
+    writer = HistoryWriter(flaky)
+    writer.submit(make_records(1)[0])
+    start = time.monotonic()
+    check("writer: permanent OS errors are not retried", writer.flush(10) and flaky.calls == 1 and time.monotonic() - start < 0.5,
+          f"{flaky.calls} calls")
+
+    # The JSONL totals sidecar failing after the lines are written must not cause a retry
+    store = JsonlHistoryStore(os.path.join(tmp, "writer.jsonl"), blob_store=blobs)
+    store.sidecar_path = os.path.join(tmp, "missing-dir", "writer.jsonl.stats.json")
+    writer = HistoryWriter(store)
+    for record in make_records(20):
+        writer.submit(record)
+    check("writer: a failed sidecar update does not duplicate records",
+          writer.flush(10) and len(list(store.iter_records())) == 20 and writer.stats()["failures"] == 0, f"{writer.stats()}")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        print("🔍 History stores...")
+        check_store("sqlite", SqliteHistoryStore(os.path.join(tmp, "history.db"), blob_store=BlobStore(os.path.join(tmp, "blobs"))))
+        jsonl_path = os.path.join(tmp, "history.jsonl")
+        check_store("jsonl", JsonlHistoryStore(jsonl_path, blob_store=BlobStore(os.path.join(tmp, "blobs"))))
+        reopened = JsonlHistoryStore(jsonl_path, blob_store=BlobStore(os.path.join(tmp, "blobs")))
+        check("jsonl: sidecar totals survive a restart", reopened.aggregates()["total"] == 204)
+        check_counter_seeding(tmp)
+
+        print("🔍 History writer...")
+        check_writer(tmp)
+
+    if failures:
+        print(f"FAILURE: {len(failures)} checks failed: {', '.join(failures)}")
+        sys.exit(1)
+    print("SUCCESS: history stores and writer behave as expected")
@@ -0,0 +1,77 @@
+"""
+Parity check: utils.text_normalizer.clean_text must produce byte-identical output
+to the original multi-pass re.sub implementation the model was trained with.
+"""
+
+import os
+import random
+import re
+import string
+import sys
+import time
+from utils.text_normalizer import clean_text, clean_batch
+
+def legacy_clean_text(text):
+    # Reference copy of the original function from train_model.py / advanced_engine.py
+    if not isinstance(text, str):
+        return ""
+    text = text.lower()
+    text = re.sub(r'https?://\S+|www\.\S+', '', text)
+    text = re.sub(r'<.*?>', '', text)
+    text = re.sub(f'[{re.escape(string.punctuation)}]', '', text)
+    text = re.sub(r'\n', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+def build_samples(n=20000, seed=42):
+    rng = random.Random(seed)
+    alphabet = (string.ascii_letters + string.digits + string.punctuation + " \t\n\r\x0b\x0c"
+                + "   “”’éİßẞ")
+    fragments = ["http://x.com/a?b=1", "https://t.co/Ab", "www.site.org", "<b>", "</p>", "<a href=http://x.com/>",
+                 "<br\n>", "HTTP://UPPER.COM", "WWW.UPPER.COM", "ht<i>tp://split", "<<>>", "don't", "U.S.A."]
+    samples = [None, 42, "", " ", "\n\n", "Hello, World!"]
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(1, 12)):
+            if rng.random() < 0.3:
+                parts.append(rng.choice(fragments))
+            else:
+                parts.append("".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20))))
+        samples.append("".join(parts))
+    # Every single code point, to catch differences in lowercasing/whitespace handling
+    samples.extend(chr(c) * 2 + " a" for c in range(0x110000) if not 0xD800 <= c <= 0xDFFF)
+    return samples
+
+def corpus_samples():
+    try:
+        import pandas as pd
+    except ImportError:
+        return []
+    samples = []
+    for name in ("Fake.csv", "True.csv"):
+        path = os.path.join("data", name)
+        if os.path.exists(path):
+            df = pd.read_csv(path, nrows=5000)
+            samples.extend((df['title'].fillna('') + " " + df['text'].fillna('')).tolist())
+    return samples
+
+if __name__ == "__main__":
+    samples = build_samples() + corpus_samples()
+    print(f"🔍 Comparing normalizers on {len(samples)} samples...")
+
+    mismatches = [s for s in samples if clean_text(s) != legacy_clean_text(s)]
+    if clean_batch(samples) != [legacy_clean_text(s) for s in samples]:
+        mismatches.append("<clean_batch differs>")
+
+    start = time.perf_counter()
+    for s in samples:
+        legacy_clean_text(s)
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    clean_batch(samples)
+    new_time = time.perf_counter() - start
+
+    if mismatches:
+        print(f"FAILURE: {len(mismatches)} mismatches, first: {mismatches[0]!r}")
+        sys.exit(1)
+    print(f"SUCCESS: byte-identical output ({legacy_time:.2f}s -> {new_time:.2f}s, {legacy_time / new_time:.1f}x faster)")
@@ -0,0 +1,150 @@
+"""
+Parity check: utils.linear_scorer.LinearScorer must give the same decision scores
+as the sklearn TfidfVectorizer.transform + decision_function pipeline, both when built
+from the pickles and from an unpruned compact artifact. The compact model the app ships
+(possibly pruned) must keep the same verdicts and calibrated confidence.
+"""
+
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import joblib
+import numpy as np
+from utils.text_normalizer import clean_text, clean_batch
+from utils.compact_model import export_compact_model, load_compact_model
+from utils.linear_scorer import LinearScorer
+from utils.calibration import apply_calibrator
+from utils.blob_store import BlobStore
+from utils.history_store import JsonlHistoryStore, load_details
+
+MODEL_FILE = "models/truthlens_model.pkl"
+VECTORIZER_FILE = "models/tfidf_vectorizer.pkl"
+CALIBRATOR_FILE = "models/truthlens_calibrator.pkl"
+COMPACT_MODEL_FILE = "models/truthlens_compact.bin"
+# The history files utils.stats_manager writes (not imported here: it needs streamlit and migrates on open)
+HISTORY_BACKEND = os.getenv("TRUTHLENS_HISTORY_BACKEND", "sqlite")
+HISTORY_DB = "data/history.db"
+STATS_FILE = "data/history.jsonl"
+LEGACY_STATS_FILE = "data/history.json"
+TOLERANCE = 1e-6
+# Same bound train_model.py applies before shipping a pruned compact model
+MAX_CONFIDENCE_DRIFT = 0.01
+
+def build_samples(vectorizer, n=3000, seed=7):
+    rng = random.Random(seed)
+    vocab = list(vectorizer.vocabulary_)
+    samples = ["", "the and of", "a", "trump trump trump", "breaking news " * 50]
+    for _ in range(n):
+        # Mix in-vocabulary terms, stop words and unknown words so norms and bigrams vary
+        words = []
+        for _ in range(rng.randint(1, 400)):
+            r = rng.random()
+            if r < 0.7:
+                words.extend(rng.choice(vocab).split())
+            elif r < 0.85:
+                words.append(rng.choice(["the", "is", "of", "and", "to", "it"]))
+            else:
+                words.append("zq" + str(rng.randint(0, 10**6)))
+        samples.append(" ".join(words))
+    return samples
+
+def iter_history():
+    """
+    History records, read-only from whichever history file exists: the current store
+    first, then the older formats StatsManager would migrate. Nothing is written.
+    """
+    current = HISTORY_DB if HISTORY_BACKEND == "sqlite" else STATS_FILE
+    for path in dict.fromkeys([current, STATS_FILE, LEGACY_STATS_FILE]):
+        if not os.path.exists(path):
+            continue
+        if path.endswith(".db"):
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            try:
+                for row in conn.execute("SELECT * FROM analyses ORDER BY id DESC"):
+                    # Cleared inline columns of migrated rows read as NULL
+                    yield {k: row[k] for k in row.keys() if row[k] is not None}
+            finally:
+                conn.close()
+        elif path.endswith(".jsonl"):
+            yield from JsonlHistoryStore(path).iter_records()
+        else:
+            with open(path, "r") as f:
+                yield from json.load(f)
+        return
+
+def history_samples(limit=2000):
+    """
+    Real articles from the analysis history.
+    """
+    blob_store = BlobStore()
+    samples = []
+    for record in iter_history():
+        article = load_details(record, blob_store).get("article_full")
+        if article:
+            samples.append(clean_text(article))
+        if len(samples) >= limit:
+            break
+    return samples
+
+def compare(name, scorer, model, vectorizer, samples):
+    expected = model.decision_function(vectorizer.transform(samples))
+    actual = scorer.decision_function(samples)
+    diff = np.abs(expected - actual).max()
+    agree = np.mean(np.sign(expected) == np.sign(actual))
+    print(f"   {name}: max |diff| {diff:.2e}, verdict agreement {agree * 100:.2f}%")
+    return diff <= TOLERANCE and agree == 1.0
+
+if __name__ == "__main__":
+    if not (os.path.exists(MODEL_FILE) and os.path.exists(VECTORIZER_FILE)):
+        print("❌ Train the model first (python train_model.py)")
+        sys.exit(1)
+
+    model = joblib.load(MODEL_FILE)
+    vectorizer = joblib.load(VECTORIZER_FILE)
+    samples = clean_batch(build_samples(vectorizer)) + history_samples()
+    print(f"🔍 Comparing scorers on {len(samples)} samples...")
+
+    ok = compare("pickles", LinearScorer.from_sklearn(model, vectorizer), model, vectorizer, samples)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "compact.bin")
+        export_compact_model(model, vectorizer, path, prune_ratio=None)
+        compact_scorer = LinearScorer.from_pair(*load_compact_model(path))
+        # The compact file stores float32 weights, hence the looser tolerance
+        expected = model.decision_function(vectorizer.transform(samples))
+        diff = np.abs(expected - compact_scorer.decision_function(samples)).max()
+        print(f"   compact (unpruned): max |diff| {diff:.2e}")
+        ok = ok and diff <= 1e-4
+
+    if os.path.exists(COMPACT_MODEL_FILE):
+        # The artifact the app actually loads may be pruned: its calibrated confidence
+        # must still match the full model the calibrator was fitted on
+        calibrator = joblib.load(CALIBRATOR_FILE) if os.path.exists(CALIBRATOR_FILE) else None
+        shipped = LinearScorer.from_pair(*load_compact_model(COMPACT_MODEL_FILE))
+        expected = model.decision_function(vectorizer.transform(samples))
+        actual = shipped.decision_function(samples)
+        drift = np.abs(apply_calibrator(calibrator, expected) - apply_calibrator(calibrator, actual)).max()
+        agree = np.mean(np.sign(expected) == np.sign(actual))
+        print(f"   shipped compact model: max confidence drift {drift:.2e}, verdict agreement {agree * 100:.2f}%")
+        ok = ok and drift <= MAX_CONFIDENCE_DRIFT and agree == 1.0
+
+    scorer = LinearScorer.from_sklearn(model, vectorizer)
+    start = time.perf_counter()
+    for s in samples:
+        model.decision_function(vectorizer.transform([s]))
+    sklearn_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for s in samples:
+        scorer.score(s)
+    scorer_time = time.perf_counter() - start
+
+    if not ok:
+        print("FAILURE: scorer output differs from the sklearn pipeline")
+        sys.exit(1)
+    print(f"SUCCESS: per-article {sklearn_time / len(samples) * 1000:.3f}ms -> "
+          f"{scorer_time / len(samples) * 1000:.3f}ms ({sklearn_time / scorer_time:.1f}x faster)")